@@ -0,0 +1,290 @@
+"""
+Streaming RSA Artifact Signing
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+SHA256-RSA-4096 detached signatures for deployment artifacts of any size
+
+Each file is hashed in fixed-size blocks and only its SHA-256 digest is
+signed, as a prehashed RSA-PSS signature, so memory use does not depend
+on the artifact size.  Signatures are written next to the artifact as
+``<artifact>.sig`` JSON files.  Verification first compares the recorded
+digest with the file, and only runs the (cheap, e = 65537) RSA check for
+files whose content still matches.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Union
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa, utils
+
+ARTIFACT_SIGNATURE_FORMAT = "artifact-signature-v1"
+SIGNATURE_ALGORITHM = "SHA256-RSA-4096-PSS"
+SIGNATURE_SUFFIX = ".sig"
+DEFAULT_KEY_PATH = os.path.expanduser("~/.config/quantum-security/artifact_rsa4096.pem")
+BLOCK_SIZE = 1024 * 1024
+
+_PSS = padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.DIGEST_LENGTH)
+_PREHASHED = utils.Prehashed(hashes.SHA256())
+
+_key_cache: Dict[str, rsa.RSAPrivateKey] = {}
+_key_lock = threading.Lock()
+
+
+def load_rsa_signing_key(path: Optional[str] = None, password: Optional[bytes] = None,
+                         create: bool = True, key_size: int = 4096) -> rsa.RSAPrivateKey:
+    """RSA private key from a PEM file, loaded once per process and cached
+
+    The path defaults to ``ARTIFACT_SIGNING_KEY`` or a file under
+    ``~/.config``.  A missing key is generated and written with mode 0600
+    when ``create`` is set.
+    """
+    path = os.path.abspath(path or os.environ.get("ARTIFACT_SIGNING_KEY") or DEFAULT_KEY_PATH)
+    with _key_lock:
+        key = _key_cache.get(path)
+        if key is not None:
+            return key
+        if os.path.exists(path):
+            with open(path, "rb") as handle:
+                key = serialization.load_pem_private_key(handle.read(), password)
+            if not isinstance(key, rsa.RSAPrivateKey):
+                raise ValueError(f"{path} does not hold an RSA private key")
+        elif create:
+            key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+            encryption = (serialization.BestAvailableEncryption(password) if password
+                          else serialization.NoEncryption())
+            pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, encryption)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(descriptor, "wb") as handle:
+                handle.write(pem)
+            logging.info(f"🔏 Generated RSA-{key_size} artifact signing key at {path}")
+        else:
+            raise FileNotFoundError(f"No signing key at {path}")
+        _key_cache[path] = key
+        return key
+
+
+def public_key_pem(public_key: rsa.RSAPublicKey) -> str:
+    return public_key.public_bytes(serialization.Encoding.PEM,
+                                   serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+
+
+def rsa_key_id(public_key: rsa.RSAPublicKey) -> str:
+    """Short identifier of a public key: SHA-256 of its DER encoding"""
+    der = public_key.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return hashlib.sha256(der).hexdigest()[:16]
+
+
+def file_digest(path: str, block_size: int = BLOCK_SIZE) -> bytes:
+    """SHA-256 of a file, read in fixed-size blocks into one reused buffer"""
+    digest = hashlib.sha256()
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as handle:
+        while True:
+            read = handle.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.digest()
+
+
+def signature_path(path: str) -> str:
+    return path + SIGNATURE_SUFFIX
+
+
+def _write_json(record: Dict[str, Any], path: str):
+    temp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(temp_path, "w") as handle:
+        json.dump(record, handle, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+class ArtifactSigner:
+    """Sign many artifacts concurrently with one RSA key loaded once per process"""
+
+    def __init__(self, key_path: Optional[str] = None, password: Optional[bytes] = None,
+                 threads: Optional[int] = None, private_key: Optional[rsa.RSAPrivateKey] = None,
+                 block_size: int = BLOCK_SIZE):
+        self.owner = "Ervin Remus Radosavlevici"
+        self.contact = "radosavlevici210@icloud.com"
+        self.private_key = private_key or load_rsa_signing_key(key_path, password)
+        self.public_key = self.private_key.public_key()
+        self.key_id = rsa_key_id(self.public_key)
+        self.threads = threads or os.cpu_count() or 1
+        self.block_size = block_size
+
+    def sign_digest(self, digest: bytes) -> bytes:
+        """RSA-PSS signature of an already computed SHA-256 digest"""
+        return self.private_key.sign(digest, _PSS, _PREHASHED)
+
+    def sign_file(self, path: str, write_signature: bool = True) -> Dict[str, Any]:
+        """Stream-hash one artifact, sign its digest and optionally write ``<path>.sig``"""
+        size = os.path.getsize(path)
+        digest = file_digest(path, self.block_size)
+        record = {
+            "format": ARTIFACT_SIGNATURE_FORMAT,
+            "artifact": os.path.basename(path),
+            "size": size,
+            "sha256": digest.hex(),
+            "algorithm": SIGNATURE_ALGORITHM,
+            "key_id": self.key_id,
+            "signature": base64.b64encode(self.sign_digest(digest)).decode(),
+            "owner": self.owner
+        }
+        if write_signature:
+            _write_json(record, signature_path(path))
+        return record
+
+    def sign_artifacts(self, paths: Sequence[str], write_signatures: bool = True) -> List[Dict[str, Any]]:
+        """Sign every artifact on the thread pool; records are returned in input order"""
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            records = list(executor.map(lambda path: self.sign_file(path, write_signatures), paths))
+        logging.info(f"🔏 Signed {len(records)} artifacts with RSA key {self.key_id}")
+        return records
+
+
+class ArtifactVerifier:
+    """Bulk verification of detached artifact signatures against a trusted public key"""
+
+    def __init__(self, public_key: Union[rsa.RSAPublicKey, bytes, str], threads: Optional[int] = None,
+                 block_size: int = BLOCK_SIZE):
+        if isinstance(public_key, str):
+            public_key = public_key.encode()
+        if isinstance(public_key, bytes):
+            public_key = serialization.load_pem_public_key(public_key)
+        if not isinstance(public_key, rsa.RSAPublicKey):
+            raise ValueError("Artifact signatures need an RSA public key")
+        self.public_key = public_key
+        self.key_id = rsa_key_id(public_key)
+        self.threads = threads or os.cpu_count() or 1
+        self.block_size = block_size
+
+    def verify_digest(self, digest: bytes, signature: bytes) -> bool:
+        try:
+            self.public_key.verify(signature, digest, _PSS, _PREHASHED)
+            return True
+        except InvalidSignature:
+            return False
+
+    def verify_file(self, path: str, record: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Check one artifact against its record (read from ``<path>.sig`` when not given)"""
+        result = {"path": path, "status": "INVALID", "content_matches": False, "signature_valid": False}
+        try:
+            if record is None:
+                with open(signature_path(path)) as handle:
+                    record = json.load(handle)
+            if record.get("format") != ARTIFACT_SIGNATURE_FORMAT:
+                result["status"] = "MALFORMED"
+                return result
+            # Size and digest are checked first; the RSA check only runs for unmodified files
+            if os.path.getsize(path) != record["size"]:
+                return result
+            digest = file_digest(path, self.block_size)
+            result["content_matches"] = digest.hex() == record["sha256"]
+            if result["content_matches"]:
+                result["signature_valid"] = self.verify_digest(digest, base64.b64decode(record["signature"]))
+        except FileNotFoundError:
+            result["status"] = "MISSING"
+            return result
+        except (OSError, ValueError, KeyError) as error:
+            logging.warning(f"🔏 Cannot verify {path}: {error}")
+            result["status"] = "MALFORMED"
+            return result
+        if result["signature_valid"]:
+            result["status"] = "VALID"
+        return result
+
+    def verify_artifacts(self, paths: Sequence[str]) -> Dict[str, Any]:
+        """Verify many artifacts on the thread pool"""
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            results = list(executor.map(self.verify_file, paths))
+        failed = [result["path"] for result in results if result["status"] != "VALID"]
+        if failed:
+            logging.warning(f"🔏 {len(failed)} of {len(results)} artifacts failed verification")
+        return {
+            "status": "VERIFIED" if not failed else "FAILED",
+            "key_id": self.key_id,
+            "artifacts_checked": len(results),
+            "failed": failed,
+            "results": results
+        }
+
+
+def benchmark_artifact_signing(artifacts: int = 32, artifact_size: int = 8 * 1024 * 1024,
+                               large_size: int = 512 * 1024 * 1024, threads: Optional[int] = None
+                               ) -> Dict[str, Any]:
+    """Bulk signing/verification throughput and peak RSS growth while signing one large artifact"""
+    import resource
+    import tempfile
+
+    signer = ArtifactSigner(threads=threads, private_key=rsa.generate_private_key(65537, 4096))
+    verifier = ArtifactVerifier(signer.public_key, threads)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        block = os.urandom(BLOCK_SIZE)
+        for index in range(artifacts):
+            path = os.path.join(directory, f"artifact-{index}.bin")
+            with open(path, "wb") as handle:
+                for _ in range(0, artifact_size, BLOCK_SIZE):
+                    handle.write(block)
+                handle.write(index.to_bytes(4, "big"))
+            paths.append(path)
+
+        start = time.perf_counter()
+        signer.sign_artifacts(paths)
+        sign_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        report = verifier.verify_artifacts(paths)
+        verify_seconds = time.perf_counter() - start
+
+        large = os.path.join(directory, "large.bin")
+        with open(large, "wb") as handle:
+            for _ in range(0, large_size, BLOCK_SIZE):
+                handle.write(block)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        signer.sign_file(large)
+        large_seconds = time.perf_counter() - start
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    return {
+        "artifacts": artifacts,
+        "threads": signer.threads,
+        "all_valid": report["status"] == "VERIFIED",
+        "signatures_per_second": artifacts / sign_seconds,
+        "verifications_per_second": artifacts / verify_seconds,
+        "large_artifact_mb_per_second": large_size / large_seconds / 1e6,
+        "large_artifact_rss_growth_kb": rss_growth
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) >= 3 and sys.argv[1] in ("sign", "verify"):
+        if sys.argv[1] == "sign":
+            signer = ArtifactSigner()
+            signer.sign_artifacts(sys.argv[2:])
+            print(f"🔏 Signed {len(sys.argv) - 2} artifacts with key {signer.key_id}")
+        else:
+            report = ArtifactVerifier(load_rsa_signing_key(create=False).public_key()).verify_artifacts(sys.argv[2:])
+            print(f"🔏 {report['status']}: {report['artifacts_checked']} checked, {len(report['failed'])} failed")
+            sys.exit(0 if report["status"] == "VERIFIED" else 1)
+    else:
+        report = benchmark_artifact_signing()
+        print("🔏 ARTIFACT SIGNING BENCHMARK")
+        print(f"{report['signatures_per_second']:.1f} signs/s, {report['verifications_per_second']:.1f} verifies/s "
+              f"for {report['artifacts']} artifacts ({report['threads']} threads)")
+        print(f"Large artifact: {report['large_artifact_mb_per_second']:.0f} MB/s, "
+              f"peak RSS growth {report['large_artifact_rss_growth_kb'] / 1024:.1f} MiB")
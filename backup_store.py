@@ -0,0 +1,447 @@
+"""
+Deduplicating Backup Store
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Content-addressed, compressed storage for timestamped backups
+
+Layout
+------
+::
+
+    <root>/packs/<pack id>.pack     compressed chunks, appended once, never modified
+    <root>/index/<pack id>.json     chunk digest -> (offset, length, codec) within the pack
+    <root>/backups/<backup id>.json manifest: chunk list, size, root digest, metadata
+
+Data is split with the content-defined chunker, so an edit changes only
+the chunks around it.  A chunk is stored once, under its SHA-256 digest,
+no matter how many backups reference it.  Every write batch produces one
+pack, one index file and one manifest per backup, made durable by a
+single round of fsync calls, and a backup becomes visible only when its
+manifest is renamed into place after its chunks are on disk.
+"""
+
+import os
+import json
+import lzma
+import time
+import uuid
+import zlib
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from content_chunking import ContentDefinedChunker, Source, _reader
+from merkle_tree import MERKLE_PROOF_FORMAT, MerkleTree, verify_range_proof, verify_items_parallel
+
+BACKUP_MANIFEST_FORMAT = "cdc-backup-v1"
+CODECS = ("none", "zlib", "lzma")
+RECORD_HEADER = 32 + 1 + 4
+
+
+def _compress(data: bytes, codec: str, level: Optional[int]) -> Tuple[str, bytes]:
+    """Compress one chunk; stores it raw if compression does not shrink it"""
+    if codec == "zlib":
+        packed = zlib.compress(data, 6 if level is None else level)
+    elif codec == "lzma":
+        packed = lzma.compress(data, preset=6 if level is None else level)
+    else:
+        return "none", data
+    return (codec, packed) if len(packed) < len(data) else ("none", data)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "lzma":
+        return lzma.decompress(data)
+    return data
+
+
+def _name_key(name: str) -> str:
+    """Filesystem-safe prefix shared by all backup ids of one name"""
+    return hashlib.sha256(name.encode()).hexdigest()[:16]
+
+
+def _write_json_durably(path: str, content: Dict[str, Any]):
+    """Write JSON to a temp file, fsync it and rename it into place"""
+    temp_path = f"{path}.tmp-{os.getpid()}"
+    with open(temp_path, "w") as handle:
+        json.dump(content, handle, separators=(",", ":"))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+
+
+def _fsync_directory(path: str):
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class BackupStore:
+    """Content-addressed backup store with chunk-level deduplication
+
+    ``put`` chunks the data and writes only chunks the store has not seen.
+    When an earlier backup with the same name exists, its manifest guides
+    re-chunking so that only the changed regions pay for the rolling hash;
+    storage and write cost then grow with the changed bytes, not the total.
+    """
+
+    def __init__(self, root: str, compression: str = "zlib", level: Optional[int] = None,
+                 threads: Optional[int] = None, **chunker_options):
+        if compression not in CODECS:
+            raise ValueError(f"Unknown compression codec: {compression}")
+        self.owner = "Ervin Remus Radosavlevici"
+        self.contact = "radosavlevici210@icloud.com"
+        self.root = root
+        self.compression = compression
+        self.level = level
+        self.threads = threads or os.cpu_count() or 1
+        self.chunker = ContentDefinedChunker(**chunker_options)
+        self.pack_directory = os.path.join(root, "packs")
+        self.index_directory = os.path.join(root, "index")
+        self.backup_directory = os.path.join(root, "backups")
+        for directory in (self.pack_directory, self.index_directory, self.backup_directory):
+            os.makedirs(directory, exist_ok=True)
+        self._index: Dict[str, Tuple[str, int, int, str]] = {}
+        self._load_index()
+
+    def _load_index(self):
+        for name in sorted(os.listdir(self.index_directory)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.index_directory, name)) as handle:
+                index = json.load(handle)
+            for digest, offset, length, codec in index["entries"]:
+                self._index.setdefault(digest, (index["pack"], offset, length, codec))
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._index
+
+    def backup_ids(self, name: Optional[str] = None) -> List[str]:
+        """Backup ids, oldest first; ids of one name share a prefix, so no manifest is read"""
+        prefix = f"{_name_key(name)}-" if name is not None else ""
+        ids = [file_name[:-len(".json")] for file_name in os.listdir(self.backup_directory)
+               if file_name.endswith(".json") and file_name.startswith(prefix)]
+        return sorted(ids, key=lambda backup_id: backup_id.split("-", 1)[1])
+
+    def list_backups(self, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Manifest summaries, oldest first, optionally for one backup name"""
+        backups = []
+        for backup_id in self.backup_ids(name):
+            manifest = self.load_manifest(backup_id)
+            backups.append({key: manifest[key] for key in ("backup_id", "name", "created", "size", "root_digest")})
+        return backups
+
+    def load_manifest(self, backup_id: str) -> Dict[str, Any]:
+        with open(os.path.join(self.backup_directory, f"{backup_id}.json")) as handle:
+            return json.load(handle)
+
+    def latest_manifest(self, name: str) -> Optional[Dict[str, Any]]:
+        backup_ids = self.backup_ids(name)
+        return self.load_manifest(backup_ids[-1]) if backup_ids else None
+
+    def _chunk_layout(self, source: Source, previous: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], int]:
+        """Chunk manifest of the source and how many bytes went through the rolling hash"""
+        if previous is not None and previous["chunk_manifest"]["parameters"] == self.chunker.parameters:
+            report = self.chunker.reverify(source, previous["chunk_manifest"])
+            return report["manifest"], report["bytes_rechunked"]
+        manifest = self.chunker.fingerprint(source)
+        return manifest, manifest["size"]
+
+    def put_many(self, items: Iterable[Tuple[str, Source, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Store several ``(name, source, metadata)`` backups as one durable write batch
+
+        ``source`` is a file path or a bytes-like object.  New chunks of all
+        backups go into a single pack; the pack, its index and the
+        manifests are fsynced together before the call returns.
+        """
+        start = time.perf_counter()
+        pack_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:12]}"
+        pack_path = os.path.join(self.pack_directory, f"{pack_id}.pack")
+        entries: List[List[Any]] = []
+        written: Dict[str, Tuple[str, int, int, str]] = {}
+        pending_manifests: List[Tuple[str, Dict[str, Any]]] = []
+        reports = []
+
+        with open(pack_path, "wb") as pack, ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for name, source, metadata in items:
+                previous = self.latest_manifest(name)
+                chunk_manifest, rechunked = self._chunk_layout(source, previous)
+
+                new_chunks, seen = [], set()
+                for offset, length, digest in chunk_manifest["chunks"]:
+                    if digest not in self._index and digest not in written and digest not in seen:
+                        seen.add(digest)
+                        new_chunks.append((offset, length, digest))
+
+                read_at, _, close = _reader(source)
+                try:
+                    raw = [read_at(offset, length) for offset, length, _ in new_chunks]
+                finally:
+                    close()
+                # zlib and lzma release the GIL, so chunks compress in parallel
+                compressed = list(executor.map(lambda data: _compress(data, self.compression, self.level), raw))
+
+                stored_bytes = 0
+                for (_, length, digest), data, (codec, packed) in zip(new_chunks, raw, compressed):
+                    if hashlib.sha256(data).hexdigest() != digest:
+                        raise ValueError(f"Source changed while backing up {name}")
+                    offset = pack.tell() + RECORD_HEADER
+                    pack.write(bytes.fromhex(digest) + bytes([CODECS.index(codec)]) +
+                               len(packed).to_bytes(4, "big") + packed)
+                    written[digest] = (pack_id, offset, len(packed), codec)
+                    entries.append([digest, offset, len(packed), codec])
+                    stored_bytes += len(packed)
+
+                created = datetime.now(timezone.utc)
+                backup_id = f"{_name_key(name)}-{created.strftime('%Y%m%dT%H%M%S%fZ')}-{chunk_manifest['root_digest'][:12]}"
+                manifest = {
+                    "format": BACKUP_MANIFEST_FORMAT,
+                    "backup_id": backup_id,
+                    "name": name,
+                    "created": created.isoformat(),
+                    "size": chunk_manifest["size"],
+                    "root_digest": chunk_manifest["root_digest"],
+                    "merkle_root": self._merkle_tree(chunk_manifest).root.hex(),
+                    "chunk_manifest": chunk_manifest,
+                    "metadata": metadata or {}
+                }
+                pending_manifests.append((backup_id, manifest))
+                reports.append({
+                    "status": "STORED",
+                    "backup_id": backup_id,
+                    "name": name,
+                    "size": chunk_manifest["size"],
+                    "root_digest": chunk_manifest["root_digest"],
+                    "chunks_total": len(chunk_manifest["chunks"]),
+                    "chunks_new": len(new_chunks),
+                    "bytes_new": sum(length for _, length, _ in new_chunks),
+                    "bytes_stored": stored_bytes,
+                    "bytes_rechunked": rechunked,
+                    "incremental": previous is not None
+                })
+
+            pack.flush()
+            os.fsync(pack.fileno())
+
+        if entries:
+            _write_json_durably(os.path.join(self.index_directory, f"{pack_id}.json"),
+                                {"pack": pack_id, "entries": entries})
+        else:
+            os.remove(pack_path)
+        for backup_id, manifest in pending_manifests:
+            _write_json_durably(os.path.join(self.backup_directory, f"{backup_id}.json"), manifest)
+        for directory in (self.pack_directory, self.index_directory, self.backup_directory):
+            _fsync_directory(directory)
+        self._index.update(written)
+
+        elapsed = time.perf_counter() - start
+        logging.info(f"💾 Stored {len(reports)} backups in {elapsed:.2f}s: "
+                     f"{sum(report['chunks_new'] for report in reports)} new chunks, "
+                     f"{sum(report['bytes_stored'] for report in reports)} bytes written")
+        return reports
+
+    def put(self, name: str, source: Source, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Store one backup of a file path or bytes-like object"""
+        return self.put_many([(name, source, metadata)])[0]
+
+    def iter_restore(self, backup_id: str) -> Iterable[bytes]:
+        """Yield the backup's content chunk by chunk, verifying every digest"""
+        manifest = self.load_manifest(backup_id)
+        descriptors: Dict[str, int] = {}
+        try:
+            for _, length, digest in manifest["chunk_manifest"]["chunks"]:
+                pack_id, offset, stored_length, codec = self._index[digest]
+                if pack_id not in descriptors:
+                    descriptors[pack_id] = os.open(os.path.join(self.pack_directory, f"{pack_id}.pack"), os.O_RDONLY)
+                data = _decompress(os.pread(descriptors[pack_id], stored_length, offset), codec)
+                if len(data) != length or hashlib.sha256(data).hexdigest() != digest:
+                    raise ValueError(f"Chunk {digest} is corrupt in pack {pack_id}")
+                yield data
+        finally:
+            for descriptor in descriptors.values():
+                os.close(descriptor)
+
+    def restore(self, backup_id: str, destination: Optional[str] = None) -> Any:
+        """Return the backup's bytes, or write them to ``destination`` and return the byte count"""
+        if destination is None:
+            return b"".join(self.iter_restore(backup_id))
+        written = 0
+        temp_path = f"{destination}.tmp-{os.getpid()}"
+        with open(temp_path, "wb") as handle:
+            for data in self.iter_restore(backup_id):
+                handle.write(data)
+                written += len(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, destination)
+        return written
+
+    @staticmethod
+    def _merkle_tree(chunk_manifest: Dict[str, Any]) -> MerkleTree:
+        """Merkle tree over the chunk digests; an empty backup has one empty chunk"""
+        digests = [bytes.fromhex(digest) for _, _, digest in chunk_manifest["chunks"]]
+        return MerkleTree(digests or [hashlib.sha256(b"").digest()])
+
+    def prove_range(self, backup_id: str, offset: int = 0, length: Optional[int] = None) -> Dict[str, Any]:
+        """Inclusion proof for the chunks covering ``length`` bytes at ``offset`` of a backup
+
+        The proof holds the covering chunks' positions and digests plus
+        O(log n) subtree hashes; together with the backup's Merkle root it
+        shows that exactly these chunks sit at this place in the backup.
+        """
+        manifest = self.load_manifest(backup_id)
+        chunks = manifest["chunk_manifest"]["chunks"]
+        end = manifest["size"] if length is None else min(manifest["size"], offset + length)
+        covering = [index for index, (chunk_offset, chunk_length, _) in enumerate(chunks)
+                    if chunk_offset < end and chunk_offset + chunk_length > offset]
+        if not covering:
+            raise ValueError(f"Byte range at {offset} is outside backup {backup_id}")
+        first, last = covering[0], covering[-1] + 1
+        tree = self._merkle_tree(manifest["chunk_manifest"])
+        return {
+            "format": MERKLE_PROOF_FORMAT,
+            "backup_id": backup_id,
+            "merkle_root": tree.root.hex(),
+            "leaf_count": len(tree),
+            "first_leaf": first,
+            "chunks": chunks[first:last],
+            "proof": [node.hex() for node in tree.range_proof(first, last)]
+        }
+
+    def verify_range(self, proof: Dict[str, Any], data: Optional[bytes] = None,
+                     merkle_root: Optional[str] = None) -> Dict[str, Any]:
+        """Check a range proof against a trusted Merkle root
+
+        ``merkle_root`` defaults to the one in the proof, which only shows
+        internal consistency; pass the root recorded at backup time (for
+        example in a signature or timestamp) for a real audit.  The chunk
+        content checked is ``data`` when given (the bytes of the covering
+        chunks), otherwise the chunks are read back from this store.
+        """
+        chunks = proof["chunks"]
+        root = bytes.fromhex(merkle_root or proof["merkle_root"])
+        digests = [bytes.fromhex(digest) for _, _, digest in chunks]
+        included = verify_range_proof(digests, proof["first_leaf"], proof["leaf_count"],
+                                      [bytes.fromhex(node) for node in proof["proof"]], root)
+        if data is None:
+            contents = [self._read_chunk(digest) for _, _, digest in chunks]
+        else:
+            base = chunks[0][0]
+            contents = [data[chunk_offset - base:chunk_offset - base + chunk_length]
+                        for chunk_offset, chunk_length, _ in chunks]
+        content_matches = all(hashlib.sha256(content).hexdigest() == digest
+                              for content, (_, _, digest) in zip(contents, chunks))
+        return {
+            "status": "VERIFIED" if included and content_matches else "FAILED",
+            "included": included,
+            "content_matches": content_matches,
+            "byte_range": [chunks[0][0], chunks[-1][0] + chunks[-1][1]]
+        }
+
+    def _read_chunk(self, digest: str) -> bytes:
+        pack_id, offset, stored_length, codec = self._index[digest]
+        descriptor = os.open(os.path.join(self.pack_directory, f"{pack_id}.pack"), os.O_RDONLY)
+        try:
+            return _decompress(os.pread(descriptor, stored_length, offset), codec)
+        finally:
+            os.close(descriptor)
+
+    def audit(self, backup_id: str, threads: Optional[int] = None) -> Dict[str, Any]:
+        """Re-hash every chunk of a backup in parallel and check the Merkle root"""
+        start = time.perf_counter()
+        manifest = self.load_manifest(backup_id)
+        chunks = manifest["chunk_manifest"]["chunks"] or [[0, 0, hashlib.sha256(b"").hexdigest()]]
+        tree = self._merkle_tree(manifest["chunk_manifest"])
+        expected_root = bytes.fromhex(manifest.get("merkle_root", tree.root.hex()))
+        descriptors = {}
+        for digest in {digest for _, _, digest in chunks}:
+            pack_id = self._index[digest][0] if digest in self._index else None
+            if pack_id is not None and pack_id not in descriptors:
+                descriptors[pack_id] = os.open(os.path.join(self.pack_directory, f"{pack_id}.pack"), os.O_RDONLY)
+
+        def load_digest(index: int) -> bytes:
+            _, length, digest = chunks[index]
+            if length == 0:
+                return hashlib.sha256(b"").digest()
+            if digest not in self._index:
+                return b""
+            pack_id, offset, stored_length, codec = self._index[digest]
+            try:
+                data = _decompress(os.pread(descriptors[pack_id], stored_length, offset), codec)
+            except (OSError, zlib.error, lzma.LZMAError):
+                return b""
+            return hashlib.sha256(data).digest()
+
+        try:
+            report = verify_items_parallel([bytes.fromhex(digest) for _, _, digest in chunks], expected_root,
+                                           load_digest, threads or self.threads)
+        finally:
+            for descriptor in descriptors.values():
+                os.close(descriptor)
+        report["status"] = "VERIFIED" if report["verified"] else "CORRUPT"
+        report["backup_id"] = backup_id
+        report["elapsed_seconds"] = time.perf_counter() - start
+        if not report["verified"]:
+            logging.warning(f"💾 Backup {backup_id} failed its audit: {len(report['corrupt_items'])} corrupt chunks")
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        """Logical size of all backups against the bytes actually stored"""
+        backups = self.list_backups()
+        logical = sum(backup["size"] for backup in backups)
+        stored = sum(length for _, _, length, _ in self._index.values())
+        return {
+            "backups": len(backups),
+            "unique_chunks": len(self._index),
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "deduplication_ratio": logical / stored if stored else 0.0
+        }
+
+
+def benchmark_backup_store(size_bytes: int = 64 * 1024 * 1024, edits: int = 16,
+                           directory: Optional[str] = None) -> Dict[str, Any]:
+    """Full backup followed by a backup after a few small edits"""
+    import tempfile
+    with tempfile.TemporaryDirectory(dir=directory) as workdir:
+        store = BackupStore(os.path.join(workdir, "store"))
+        data = bytearray(os.urandom(size_bytes // 2) + bytes(size_bytes - size_bytes // 2))
+        start = time.perf_counter()
+        first = store.put("benchmark", bytes(data))
+        first_seconds = time.perf_counter() - start
+
+        for edit in range(edits):
+            position = (edit * 7919 * 4096) % (size_bytes - 64)
+            data[position:position + 64] = os.urandom(64)
+        start = time.perf_counter()
+        second = store.put("benchmark", bytes(data))
+        second_seconds = time.perf_counter() - start
+        restored = store.restore(second["backup_id"]) == bytes(data)
+
+        return {
+            "size_bytes": size_bytes,
+            "full_backup_seconds": first_seconds,
+            "full_backup_bytes_stored": first["bytes_stored"],
+            "incremental_backup_seconds": second_seconds,
+            "incremental_bytes_new": second["bytes_new"],
+            "incremental_bytes_stored": second["bytes_stored"],
+            "incremental_bytes_rechunked": second["bytes_rechunked"],
+            "restore_verified": restored,
+            "store": store.stats()
+        }
+
+
+if __name__ == "__main__":
+    report = benchmark_backup_store()
+    print("💾 BACKUP STORE BENCHMARK")
+    print(f"Full backup: {report['full_backup_seconds']:.2f}s, {report['full_backup_bytes_stored']} bytes stored")
+    print(f"Incremental backup: {report['incremental_backup_seconds']:.2f}s, "
+          f"{report['incremental_bytes_new']} new bytes, {report['incremental_bytes_stored']} bytes stored")
+    print(f"Restore verified: {report['restore_verified']}")
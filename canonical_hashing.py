@@ -0,0 +1,353 @@
+"""
+Incremental Canonical Hashing
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Order-independent digests of nested structures with per-subtree caching
+
+Format ``canonical-sha256-v1``
+------------------------------
+Every container is hashed on its own and its parent absorbs only the
+32-byte digest, so the digest of a structure is a Merkle tree over its
+containers.  Scalars are encoded inline as a one-byte tag and a
+length-prefixed payload::
+
+    None  n          bool  t / f           int    i <len> <decimal>
+    float d <hex>    str   s <chars> <utf-8>   bytes  b <len> <raw>
+    numpy array   a <dtype> <shape> <len> <raw>
+    other object  o <type name> <str(obj)>
+
+    list / tuple  SHA-256("l" | "u" <count> <item>...)
+    dict          SHA-256("m" <count> (<key> <value>)... sorted by key encoding)
+    set           SHA-256("e" <count> <item>... sorted by item encoding)
+
+where a nested container appears as ``h`` followed by its digest.  Key
+order, insertion history and repr details therefore never change the
+digest.
+"""
+
+import struct
+import hashlib
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+CANONICAL_HASH_FORMAT = "canonical-sha256-v1"
+STRING_SLICE = 1024 * 1024
+
+_CONTAINERS = (dict, list, tuple, set, frozenset)
+
+
+def _length(value: int) -> bytes:
+    return struct.pack(">Q", value)
+
+
+class VersionedDict(dict):
+    """dict whose ``canonical_version`` changes on every mutation, so its digest can be cached"""
+
+    canonical_version = 0
+
+    def _touch(self):
+        self.canonical_version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._touch()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._touch()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._touch()
+
+    def setdefault(self, key, default=None):
+        self._touch()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self._touch()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._touch()
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self._touch()
+
+    def __ior__(self, other):
+        self._touch()
+        return super().__ior__(other)
+
+
+class VersionedList(list):
+    """list whose ``canonical_version`` changes on every mutation, so its digest can be cached"""
+
+    canonical_version = 0
+
+    def _touch(self):
+        self.canonical_version += 1
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._touch()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._touch()
+
+    def __iadd__(self, other):
+        self._touch()
+        return super().__iadd__(other)
+
+    def __imul__(self, other):
+        self._touch()
+        return super().__imul__(other)
+
+    def append(self, value):
+        super().append(value)
+        self._touch()
+
+    def extend(self, values):
+        super().extend(values)
+        self._touch()
+
+    def insert(self, index, value):
+        super().insert(index, value)
+        self._touch()
+
+    def pop(self, *args):
+        self._touch()
+        return super().pop(*args)
+
+    def remove(self, value):
+        super().remove(value)
+        self._touch()
+
+    def clear(self):
+        super().clear()
+        self._touch()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._touch()
+
+    def reverse(self):
+        super().reverse()
+        self._touch()
+
+
+class CanonicalHasher:
+    """Streaming canonical encoder with a digest cache for versioned containers
+
+    Scalars are fed to the hasher piece by piece (long strings in slices),
+    so the full encoding is never built.  Containers that carry a
+    ``canonical_version`` attribute (``VersionedDict``, ``VersionedList``)
+    have their digest cached by object identity and version.  A cached
+    digest is reused only if the versions of all containers below it are
+    unchanged as well, which is checked without touching any scalar, so
+    re-hashing a mostly unchanged structure only re-hashes the changed
+    subtrees.  A versioned container holding a plain list, dict or set (or
+    another mutable value such as an array) is never cached, since changes
+    inside it would go unnoticed.
+    """
+
+    def __init__(self):
+        # id -> (weak reference, version, digest, nested versioned containers)
+        self._cache: Dict[int, Tuple[Any, int, bytes, List[Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _forget(self, identity: int):
+        self._cache.pop(identity, None)
+
+    def _cached(self, value: Any) -> Optional[bytes]:
+        entry = self._cache.get(id(value))
+        if entry is None or entry[0]() is not value or entry[1] != value.canonical_version:
+            return None
+        for child in entry[3]:
+            if self._cached(child) is None:
+                return None
+        return entry[2]
+
+    @staticmethod
+    def _scalar_encoding(value: Any) -> Optional[bytes]:
+        """Inline encoding of a small immutable scalar, or None if it must be streamed"""
+        kind = type(value)
+        if kind is str and len(value) <= STRING_SLICE:
+            return b"s" + _length(len(value)) + value.encode("utf-8", "surrogatepass")
+        if kind is int:
+            encoded = str(value).encode()
+            return b"i" + _length(len(encoded)) + encoded
+        if value is None:
+            return b"n"
+        if kind is bool:
+            return b"t" if value else b"f"
+        if kind is float:
+            encoded = value.hex().encode()
+            return b"d" + _length(len(encoded)) + encoded
+        if kind is bytes and len(value) <= STRING_SLICE:
+            return b"b" + _length(len(value)) + value
+        return None
+
+    def _stream_scalar(self, hasher, value: Any) -> bool:
+        """Feed a large or unusual scalar; returns False for mutable values such as arrays"""
+        if isinstance(value, bool):
+            hasher.update(b"t" if value else b"f")
+        elif isinstance(value, int):
+            encoded = str(int(value)).encode()
+            hasher.update(b"i" + _length(len(encoded)) + encoded)
+        elif isinstance(value, float):
+            encoded = float(value).hex().encode()
+            hasher.update(b"d" + _length(len(encoded)) + encoded)
+        elif isinstance(value, str):
+            hasher.update(b"s" + _length(len(value)))
+            for offset in range(0, len(value), STRING_SLICE):
+                hasher.update(value[offset:offset + STRING_SLICE].encode("utf-8", "surrogatepass"))
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            view = memoryview(value).cast("B")
+            hasher.update(b"b" + _length(view.nbytes))
+            hasher.update(view)
+        elif hasattr(value, "dtype") and hasattr(value, "shape") and hasattr(value, "tobytes"):
+            header = f"{value.dtype.str}|{','.join(map(str, value.shape))}".encode()
+            payload = value.tobytes()
+            hasher.update(b"a" + _length(len(header)) + header + _length(len(payload)))
+            hasher.update(payload)
+        else:
+            encoded = f"{type(value).__qualname__}|{value}".encode("utf-8", "surrogatepass")
+            hasher.update(b"o" + _length(len(encoded)) + encoded)
+        return isinstance(value, (int, float, str, bytes))
+
+    def _feed(self, hasher, value: Any, dependencies: List[Any]) -> bool:
+        """Feed one value into a parent's hasher, hashing containers separately
+
+        Returns False if the value is mutable and its changes cannot be
+        detected, which makes every container above it uncacheable.
+        """
+        encoding = self._scalar_encoding(value)
+        if encoding is not None:
+            hasher.update(encoding)
+            return True
+        if not isinstance(value, _CONTAINERS):
+            return self._stream_scalar(hasher, value)
+        digest, stable, nested = self._container_digest(value)
+        hasher.update(b"h" + digest)
+        if getattr(value, "canonical_version", None) is not None:
+            dependencies.append(value)
+        else:
+            dependencies.extend(nested)
+        return stable
+
+    def _encoding(self, value: Any, dependencies: List[Any]) -> Tuple[bytes, bool]:
+        """Complete encoding of a key or set member, used for ordering"""
+        encoding = self._scalar_encoding(value)
+        if encoding is not None:
+            return encoding, True
+        collector = _Collector()
+        stable = self._feed(collector, value, dependencies)
+        return collector.value(), stable
+
+    def _container_digest(self, value: Any) -> Tuple[bytes, bool, List[Any]]:
+        """Digest, whether later changes would be detected, and the versioned containers below"""
+        version = getattr(value, "canonical_version", None)
+        if version is not None:
+            cached = self._cached(value)
+            if cached is not None:
+                self.hits += 1
+                return cached, True, []
+            self.misses += 1
+
+        output = _BufferedHasher()
+        dependencies: List[Any] = []
+        stable = True
+        if isinstance(value, dict):
+            output.update(b"m" + _length(len(value)))
+            entries = []
+            for key, item in value.items():
+                encoding, key_stable = self._encoding(key, dependencies)
+                stable &= key_stable
+                entries.append((encoding, item))
+            entries.sort(key=lambda entry: entry[0])
+            for key_encoding, item in entries:
+                output.update(key_encoding)
+                stable &= self._feed(output, item, dependencies)
+        elif isinstance(value, (set, frozenset)):
+            output.update(b"e" + _length(len(value)))
+            encodings = []
+            for item in value:
+                encoding, item_stable = self._encoding(item, dependencies)
+                stable &= item_stable
+                encodings.append(encoding)
+            for encoding in sorted(encodings):
+                output.update(encoding)
+        else:
+            output.update((b"l" if isinstance(value, list) else b"u") + _length(len(value)))
+            for item in value:
+                stable &= self._feed(output, item, dependencies)
+        digest = output.digest()
+
+        if version is not None:
+            if stable:
+                identity = id(value)
+                reference = weakref.ref(value, lambda _, identity=identity: self._forget(identity))
+                self._cache[identity] = (reference, version, digest, dependencies)
+            return digest, stable, []
+        # Plain lists, dicts and sets can change unnoticed; tuples and frozensets cannot
+        return digest, stable and isinstance(value, (tuple, frozenset)), dependencies
+
+    def digest(self, value: Any) -> bytes:
+        """Binary canonical digest of any value"""
+        if isinstance(value, _CONTAINERS):
+            return self._container_digest(value)[0]
+        output = _BufferedHasher()
+        self._feed(output, value, [])
+        return output.digest()
+
+    def hexdigest(self, value: Any) -> str:
+        return self.digest(value).hex()
+
+
+class _BufferedHasher:
+    """SHA-256 that batches the many small encodings of a container into few updates"""
+
+    def __init__(self, flush_size: int = 64 * 1024):
+        self._hasher = hashlib.sha256()
+        self._parts: List[bytes] = []
+        self._pending = 0
+        self._flush_size = flush_size
+
+    def update(self, data):
+        self._parts.append(data)
+        self._pending += len(data)
+        if self._pending >= self._flush_size:
+            self._hasher.update(b"".join(self._parts))
+            self._parts.clear()
+            self._pending = 0
+
+    def digest(self) -> bytes:
+        self._hasher.update(b"".join(self._parts))
+        self._parts.clear()
+        return self._hasher.digest()
+
+
+class _Collector:
+    """Minimal hasher stand-in that keeps the bytes fed to it"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def update(self, data):
+        self._parts.append(bytes(data))
+
+    def value(self) -> bytes:
+        return b"".join(self._parts)
+
+
+_default_hasher = CanonicalHasher()
+
+
+def canonical_digest(value: Any, hasher: Optional[CanonicalHasher] = None) -> str:
+    """Hex ``canonical-sha256-v1`` digest of a value"""
+    return (hasher or _default_hasher).hexdigest(value)
@@ -13,9 +13,12 @@ Any unauthorized use, modification, or distribution is strictly prohibited.
 If found without proper attribution, report immediately to radosavlevici210@icloud.com
 """
 
+import os
 import hashlib
 import json
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timezone
 
 class CopyrightProtection:
@@ -51,33 +54,22 @@ Report theft to: radosavlevici210@icloud.com
         return header
     
     def verify_ownership(self, data):
-        """Verify ownership attribution in data"""
-        data_str = str(data).lower()
+        """Verify ownership attribution in data
+
+        data may be a str, bytes, a file-like object or an iterable of
+        chunks; all markers are searched for in one streaming pass that
+        stops once every marker has been found.
+        """
+        found = self._marker_scanner().scan(data)
         
         verification_result = {
-            'ownership_verified': False,
-            'copyright_present': False,
-            'contact_present': False,
-            'timestamp_present': False,
+            'ownership_verified': 'owner' in found,
+            'copyright_present': 'copyright' in found,
+            'contact_present': 'contact' in found,
+            'timestamp_present': 'year' in found and 'timestamp' in found,
             'protection_level': 'none'
         }
         
-        # Check for copyright notice
-        if self.copyright_notice.lower() in data_str:
-            verification_result['copyright_present'] = True
-        
-        # Check for contact information
-        if self.contact_email.lower() in data_str:
-            verification_result['contact_present'] = True
-        
-        # Check for official owner
-        if self.official_owner.lower() in data_str:
-            verification_result['ownership_verified'] = True
-        
-        # Check for timestamp
-        if "2025" in data_str and "timestamp" in data_str:
-            verification_result['timestamp_present'] = True
-        
         # Determine protection level
         score = sum([
             verification_result['ownership_verified'],
@@ -97,9 +89,71 @@ Report theft to: radosavlevici210@icloud.com
         
         return verification_result
     
-    def create_ownership_signature(self, data):
-        """Create cryptographic ownership signature"""
+    def _marker_scanner(self):
+        """Scanner for this instance's markers, compiled on first use"""
+        scanner = getattr(self, '_scanner', None)
+        if scanner is None:
+            from ownership_scanner import OwnershipMarkerScanner
+            scanner = OwnershipMarkerScanner({
+                'copyright': self.copyright_notice,
+                'contact': self.contact_email,
+                'owner': self.official_owner,
+                'year': "2025",
+                'timestamp': "timestamp"
+            })
+            self._scanner = scanner
+        return scanner
+    
+    def _canonical_hasher(self):
+        """Canonical hasher whose subtree cache lives as long as this instance"""
+        hasher = getattr(self, '_hasher', None)
+        if hasher is None:
+            from canonical_hashing import CanonicalHasher
+            hasher = CanonicalHasher()
+            self._hasher = hasher
+        return hasher
+    
+    def create_ownership_signature(self, data, mode="full", previous_manifest=None, signer=None):
+        """Create cryptographic ownership signature
+
+        mode="full" hashes str(data) in one pass.  mode="chunked" treats a
+        str as a file path (other non-bytes data as str(data)) and hashes it
+        in content-defined chunks; passing the chunk_manifest of an earlier
+        signature as previous_manifest re-chunks only the changed regions
+        and reports them.  mode="tree" takes the same inputs and hashes them
+        as a parallel SHA-256 tree (see tree_hashing).  mode="canonical"
+        hashes nested structures independently of key order and repr,
+        re-hashing only the changed subtrees of versioned containers on
+        re-signing (see canonical_hashing).  With an OwnershipSigner the
+        signature data is also sealed with Ed25519 (see ownership_signing).
+        """
         timestamp = datetime.now(timezone.utc).isoformat()
+        extras = {}
+        
+        if mode == "full":
+            data_hash = hashlib.sha256(str(data).encode()).hexdigest()
+        elif mode == "chunked":
+            from content_chunking import fingerprint_file, reverify_file
+            source = data if isinstance(data, (str, bytes, bytearray, memoryview)) else str(data).encode()
+            if previous_manifest is not None:
+                report = reverify_file(source, previous_manifest)
+                manifest = report['manifest']
+                extras['changed_ranges'] = report['changed_ranges']
+                extras['removed_ranges'] = report['removed_ranges']
+            else:
+                manifest = fingerprint_file(source)
+            data_hash = manifest['root_digest']
+            extras['chunk_manifest'] = manifest
+        elif mode == "tree":
+            from tree_hashing import TreeHasher
+            source = data if isinstance(data, (str, bytes, bytearray, memoryview)) else str(data).encode()
+            tree = TreeHasher().hash(source)
+            data_hash = tree['digest']
+            extras['tree_hash'] = {key: tree[key] for key in ('format', 'leaf_size', 'size', 'leaves')}
+        elif mode == "canonical":
+            data_hash = self._canonical_hasher().hexdigest(data)
+        else:
+            raise ValueError(f"Unknown signature mode: {mode}")
         
         signature_data = {
             'owner': self.official_owner,
@@ -107,20 +161,26 @@ Report theft to: radosavlevici210@icloud.com
             'copyright': self.copyright_notice,
             'official_timestamp': self.official_timestamp,
             'signature_timestamp': timestamp,
-            'data_hash': hashlib.sha256(str(data).encode()).hexdigest(),
+            'data_hash': data_hash,
             'system': 'quantum_security_crystal_system'
         }
+        if mode != "full":
+            signature_data['hash_mode'] = mode
         
         # Create signature hash
         signature_string = json.dumps(signature_data, sort_keys=True)
         signature_hash = hashlib.sha256(signature_string.encode()).hexdigest()
         
-        return {
+        result = {
             'signature': signature_hash,
             'signature_data': signature_data,
             'verification_code': signature_hash[:16].upper(),
-            'protection_active': True
+            'protection_active': True,
+            **extras
         }
+        if signer is not None:
+            result = signer.sign_ownership_signatures([result])[0]
+        return result
     
     def generate_anti_theft_notice(self):
         """Generate comprehensive anti-theft protection notice"""
@@ -188,9 +248,22 @@ PROTECTION LEVEL: MAXIMUM | STATUS: ACTIVE | MONITORING: ENABLED
 """
         return notice
     
-    def create_timestamped_backup(self, data):
-        """Create timestamped backup with copyright protection"""
+    def create_timestamped_backup(self, data, hash_mode="full", store=None, backup_name="timestamped_backup"):
+        """Create timestamped backup with copyright protection
+
+        hash_mode="canonical" computes verification_hash with the
+        canonical structure hash instead of hashing str(data).  With a
+        store (a BackupStore or its directory) the data is also persisted
+        there under backup_name, deduplicated against earlier backups; the
+        store's report is returned under 'backup'.
+        """
         timestamp = datetime.now(timezone.utc).isoformat()
+        if hash_mode == "full":
+            verification_hash = hashlib.sha256(str(data).encode()).hexdigest()
+        elif hash_mode == "canonical":
+            verification_hash = self._canonical_hasher().hexdigest(data)
+        else:
+            raise ValueError(f"Unknown backup hash mode: {hash_mode}")
         
         protected_data = {
             'data': data,
@@ -201,24 +274,64 @@ PROTECTION LEVEL: MAXIMUM | STATUS: ACTIVE | MONITORING: ENABLED
                 'official_timestamp': self.official_timestamp,
                 'backup_timestamp': timestamp,
                 'protection_level': 'maximum',
-                'verification_hash': hashlib.sha256(str(data).encode()).hexdigest(),
+                'verification_hash': verification_hash,
                 'system_signature': 'quantum_security_crystal_system_v1.0'
             },
             'anti_theft_notice': 'This backup is protected by copyright law. Unauthorized use prohibited.',
             'contact_for_licensing': self.contact_email
         }
+        if hash_mode != "full":
+            protected_data['protection_metadata']['hash_mode'] = hash_mode
+        
+        if store is not None:
+            from backup_store import BackupStore
+            if isinstance(store, str):
+                store = BackupStore(store)
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                payload = data
+            elif isinstance(data, str):
+                payload = data.encode()
+            else:
+                payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str).encode()
+            protected_data['backup'] = store.put(backup_name, payload, protected_data['protection_metadata'])
         
         return protected_data
     
-    def validate_system_integrity(self):
-        """Validate overall system integrity and protection status"""
+    def validate_system_integrity(self, root=None, baseline_path=None, public_key=None):
+        """Validate overall system integrity and protection status
+        
+        Hashes the deployment tree (by default the directory of this
+        module) with the incremental integrity scanner and compares it
+        with the signed baseline at baseline_path (default
+        INTEGRITY_BASELINE or .integrity_baseline.json in the root).
+        public_key is the trusted baseline signing key (raw or base64,
+        default INTEGRITY_PUBLIC_KEY).
+        """
+        from integrity_scanner import BASELINE_FILE_NAME, IntegrityScanner, load_baseline
+        root = root or os.path.dirname(os.path.abspath(__file__))
+        baseline_path = baseline_path or os.environ.get('INTEGRITY_BASELINE') or os.path.join(root, BASELINE_FILE_NAME)
+        public_key = public_key or os.environ.get('INTEGRITY_PUBLIC_KEY')
+        scanner = IntegrityScanner(root)
+        if os.path.exists(baseline_path):
+            integrity = scanner.verify(load_baseline(baseline_path), public_key)
+        else:
+            scan = scanner.scan()
+            integrity = {
+                'status': 'NO_BASELINE',
+                'signature_valid': False,
+                'files_scanned': scan['files_scanned'],
+                'files_hashed': scan['files_hashed'],
+                'elapsed_seconds': scan['elapsed_seconds']
+            }
+        intact = integrity['status'] == 'INTACT'
+        
         validation_report = {
             'system_name': 'Quantum Security Crystal System',
-            'protection_status': 'active',
-            'owner_verified': True,
-            'copyright_valid': True,
-            'timestamp_authentic': True,
-            'anti_theft_enabled': True,
+            'protection_status': 'active' if intact else 'compromised',
+            'owner_verified': intact,
+            'copyright_valid': intact,
+            'timestamp_authentic': integrity['signature_valid'],
+            'anti_theft_enabled': self.protection_active,
             'validation_timestamp': datetime.now(timezone.utc).isoformat(),
             'protection_details': {
                 'owner': self.official_owner,
@@ -228,7 +341,8 @@ PROTECTION LEVEL: MAXIMUM | STATUS: ACTIVE | MONITORING: ENABLED
                 'protection_algorithms': 'quantum_enhanced',
                 'verification_methods': ['hash_validation', 'signature_verification', 'timestamp_authentication']
             },
-            'compliance_status': 'fully_compliant',
+            'integrity': integrity,
+            'compliance_status': 'fully_compliant' if intact else 'integrity_check_failed',
             'legal_status': 'protected_worldwide'
         }
         
@@ -249,6 +363,120 @@ def verify_ownership_status(data):
     """Verify ownership status of data"""
     return copyright_protection.verify_ownership(data)
 
+def _verify_ownership_chunk(chunk, as_paths):
+    """Worker: verify one chunk of (index, document) pairs; files are streamed, not loaded"""
+    results = []
+    for index, document in chunk:
+        try:
+            if as_paths:
+                with open(document, 'rb') as handle:
+                    result = copyright_protection.verify_ownership(handle)
+                result['path'] = document
+            else:
+                result = copyright_protection.verify_ownership(document)
+        except OSError as error:
+            result = {'path': document, 'protection_level': 'error', 'error': str(error)}
+        result['index'] = index
+        results.append(result)
+    return results
+
+def iter_verify_ownership_batch(documents, as_paths=False, workers=None, chunk_size=32):
+    """Verify many documents (or file paths) on a process pool, yielding results as they complete
+
+    Documents are submitted in chunks of chunk_size, with at most two
+    chunks per worker in flight, so thousands of inputs are never all
+    pickled up front.  Each result is the verify_ownership dict plus the
+    document's 'index' (and 'path' for files); results arrive in
+    completion order, not input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = set()
+    indexed = enumerate(documents)
+    exhausted = False
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 2:
+                chunk = [item for _, item in zip(range(chunk_size), indexed)]
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(_verify_ownership_chunk, chunk, as_paths))
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+def verify_ownership_batch(documents, as_paths=False, workers=None, chunk_size=32, on_result=None):
+    """Verify many documents or file paths in parallel and summarise protection levels
+
+    on_result, if given, is called with every result as it completes;
+    the returned summary holds all results in input order and a
+    histogram of protection_level.
+    """
+    start = time.perf_counter()
+    results = []
+    histogram = Counter()
+    for result in iter_verify_ownership_batch(documents, as_paths, workers, chunk_size):
+        histogram[result['protection_level']] += 1
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda result: result['index'])
+    return {
+        'status': 'completed',
+        'documents_verified': len(results),
+        'protection_level_histogram': dict(histogram),
+        'elapsed_seconds': elapsed,
+        'documents_per_second': len(results) / elapsed if elapsed else 0.0,
+        'results': results
+    }
+
+def add_ownership_verification_routes(app, path_root=None):
+    """Add batch ownership verification routes to an existing Flask app
+
+    POST /api/ownership/verify-batch takes {"documents": [...]} or, when
+    path_root is set, {"paths": [...]} relative to path_root, and streams
+    one JSON line per result followed by a summary line with the
+    protection_level histogram.
+    """
+    from flask import Response, jsonify, request, stream_with_context
+    
+    @app.route('/api/ownership/verify-batch', methods=['POST'])
+    def verify_ownership_batch_route():
+        """Stream batch verification results as newline-delimited JSON"""
+        payload = request.get_json() or {}
+        workers = payload.get('workers')
+        if 'paths' in payload:
+            if path_root is None:
+                return jsonify({"error": "Path verification is not enabled"}), 400
+            root = os.path.realpath(path_root)
+            documents = [os.path.realpath(os.path.join(root, path)) for path in payload['paths']]
+            if any(os.path.commonpath([root, path]) != root for path in documents):
+                return jsonify({"error": "Paths must stay inside the verification root"}), 400
+            as_paths = True
+        elif 'documents' in payload:
+            documents = payload['documents']
+            as_paths = False
+        else:
+            return jsonify({"error": "documents or paths is required"}), 400
+        
+        def generate():
+            start = time.perf_counter()
+            histogram = Counter()
+            for result in iter_verify_ownership_batch(documents, as_paths, workers):
+                histogram[result['protection_level']] += 1
+                if as_paths:
+                    result['path'] = os.path.relpath(result['path'], root)
+                yield json.dumps(result) + "\n"
+            yield json.dumps({
+                'status': 'completed',
+                'documents_verified': sum(histogram.values()),
+                'protection_level_histogram': dict(histogram),
+                'elapsed_seconds': time.perf_counter() - start
+            }) + "\n"
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 if __name__ == "__main__":
     # Display anti-theft notice when run directly
     protection = CopyrightProtection()
@@ -0,0 +1,481 @@
+"""
+Vectorized Image Watermarking Engine
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Raster copyright watermarks composited with NumPy across image batches
+"""
+
+import os
+import time
+import struct
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+SUPPORTED_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+STRIP_OUTPUT_EXTENSIONS = (".tif", ".tiff", ".raw", ".rgb")
+
+# Pillow raw modes that can be mapped straight from disk: (bytes per pixel, channel order)
+RAW_LAYOUTS = {
+    "RGB": (3, [0, 1, 2]),
+    "RGBA": (4, [0, 1, 2, 3]),
+    "RGBX": (4, [0, 1, 2]),
+    "BGR": (3, [2, 1, 0]),
+    "BGRA": (4, [2, 1, 0, 3]),
+    "BGRX": (4, [2, 1, 0]),
+    "L": (1, [0, 0, 0]),
+}
+
+
+class ImageWatermarkingEngine:
+    """Raster watermark engine with cached premultiplied overlays
+
+    The overlay mirrors the CSS watermark used by
+    ``generate_copyright_watermark_html``: a 200x200 tile carrying the
+    copyright text rotated by -45 degrees in rgba(107, 115, 255, 0.1),
+    repeated across the whole image.
+    """
+
+    def __init__(self, text: Optional[str] = None, tile_size: int = 200,
+                 font_size: int = 14, color: Tuple[int, int, int] = (107, 115, 255),
+                 opacity: float = 0.1, angle: float = -45.0, cache_size: int = 8,
+                 strip_threshold_pixels: int = 64_000_000, strip_height: int = 256):
+        self.owner = "Ervin Remus Radosavlevici"
+        self.contact = "radosavlevici210@icloud.com"
+        self.orcid = "0009-0000-9787-510X"
+        self.text = text or f"© {self.owner}"
+        self.tile_size = tile_size
+        self.font_size = font_size
+        self.color = color
+        self.opacity = opacity
+        self.angle = angle
+        self.cache_size = cache_size
+        self.strip_threshold_pixels = strip_threshold_pixels
+        self.strip_height = strip_height
+        self._tile: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._overlay_cache: "OrderedDict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+
+    def _load_font(self) -> ImageFont.ImageFont:
+        """Load a scalable font, falling back to the Pillow bitmap font"""
+        for font_name in ("DejaVuSans.ttf", "Arial.ttf", "arial.ttf"):
+            try:
+                return ImageFont.truetype(font_name, self.font_size)
+            except OSError:
+                continue
+        try:
+            return ImageFont.load_default(size=self.font_size)
+        except TypeError:
+            return ImageFont.load_default()
+
+    def _rasterize_tile(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Rasterize one watermark tile as (premultiplied RGB, 1 - alpha)"""
+        size = self.tile_size
+        # Draw on a canvas wide enough for the unrotated text, then crop the tile
+        canvas = 2 * size
+        mask = Image.new("L", (canvas, canvas), 0)
+        draw = ImageDraw.Draw(mask)
+        font = self._load_font()
+        left, top, right, bottom = draw.textbbox((0, 0), self.text, font=font)
+        draw.text(((canvas - (right - left)) / 2 - left, (canvas - (bottom - top)) / 2 - top),
+                  self.text, fill=255, font=font)
+        # CSS rotates clockwise for positive angles, PIL counter-clockwise
+        mask = mask.rotate(-self.angle, resample=Image.BICUBIC)
+        offset = (canvas - size) // 2
+        mask = mask.crop((offset, offset, offset + size, offset + size))
+
+        alpha = np.asarray(mask, dtype=np.float32) * (self.opacity / 255.0)
+        alpha = alpha[:, :, np.newaxis]
+        premultiplied = alpha * np.asarray(self.color, dtype=np.float32)
+        return premultiplied, 1.0 - alpha
+
+    def get_tile(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the cached premultiplied watermark tile"""
+        if self._tile is None:
+            self._tile = self._rasterize_tile()
+        return self._tile
+
+    def overlay_region(self, top: int, bottom: int, left: int, right: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Build the repeated overlay for an arbitrary image region"""
+        premultiplied, inverse_alpha = self.get_tile()
+        rows = np.arange(top, bottom) % self.tile_size
+        cols = np.arange(left, right) % self.tile_size
+        index = np.ix_(rows, cols)
+        return premultiplied[index], inverse_alpha[index]
+
+    def get_overlay(self, height: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the full-size overlay, rasterized once per image size"""
+        key = (height, width)
+        overlay = self._overlay_cache.get(key)
+        if overlay is not None:
+            self._overlay_cache.move_to_end(key)
+            return overlay
+
+        overlay = self.overlay_region(0, height, 0, width)
+        self._overlay_cache[key] = overlay
+        if len(self._overlay_cache) > self.cache_size:
+            self._overlay_cache.popitem(last=False)
+        return overlay
+
+    @staticmethod
+    def composite(pixels: np.ndarray, premultiplied: np.ndarray, inverse_alpha: np.ndarray) -> np.ndarray:
+        """Alpha-composite a premultiplied overlay onto uint8 pixels
+
+        ``pixels`` may be a single (H, W, C) image or an (N, H, W, C) batch;
+        the overlay broadcasts over the batch axis.  An alpha channel in the
+        input is passed through untouched.
+        """
+        color = pixels[..., :3].astype(np.float32)
+        color *= inverse_alpha
+        color += premultiplied
+        np.rint(color, out=color)
+
+        result = np.empty_like(pixels)
+        result[..., :3] = color
+        if pixels.shape[-1] > 3:
+            result[..., 3:] = pixels[..., 3:]
+        return result
+
+    def composite_batch(self, images: np.ndarray) -> np.ndarray:
+        """Watermark a batch of same-sized images shaped (N, H, W, C)"""
+        if images.ndim != 4 or images.shape[-1] not in (3, 4):
+            raise ValueError("Image batch must be shaped (N, H, W, 3|4)")
+        premultiplied, inverse_alpha = self.get_overlay(images.shape[1], images.shape[2])
+        return self.composite(images, premultiplied, inverse_alpha)
+
+    def watermark_image(self, image: Image.Image) -> Image.Image:
+        """Watermark a single PIL image"""
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        pixels = np.asarray(image)
+        return Image.fromarray(self.composite_batch(pixels[np.newaxis])[0])
+
+    def watermark_files(self, files: List[Tuple[str, str]], batch_size: int = 8) -> List[Dict[str, Any]]:
+        """Watermark (source, destination) file pairs, batching equal sizes"""
+        groups: Dict[Tuple[int, int, str], List[Tuple[str, str]]] = {}
+        results = []
+        for source, destination in files:
+            with _open_lazily(source) as image:
+                width, height = image.size
+                mode = "RGBA" if "A" in image.getbands() else "RGB"
+            if width * height >= self.strip_threshold_pixels and \
+                    destination.lower().endswith(STRIP_OUTPUT_EXTENSIONS):
+                results.append(self.watermark_large_image(source, destination))
+            else:
+                groups.setdefault((height, width, mode), []).append((source, destination))
+
+        for (height, width, mode), members in groups.items():
+            for start in range(0, len(members), batch_size):
+                batch_files = members[start:start + batch_size]
+                batch = np.stack([_load_pixels(source, mode) for source, _ in batch_files])
+                watermarked = self.composite_batch(batch)
+
+                for (source, destination), pixels in zip(batch_files, watermarked):
+                    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+                    output = Image.fromarray(pixels)
+                    if destination.lower().endswith((".jpg", ".jpeg")):
+                        output.convert("RGB").save(destination, quality=95)
+                    else:
+                        output.save(destination)
+                    results.append({
+                        "source": source,
+                        "destination": destination,
+                        "width": width,
+                        "height": height,
+                        "status": "WATERMARKED"
+                    })
+        return results
+
+    def watermark_large_image(self, source: str, destination: str, strip_height: Optional[int] = None,
+                              raw_shape: Optional[Tuple[int, int]] = None,
+                              raw_mode: str = "RGB") -> Dict[str, Any]:
+        """Watermark a huge image strip by strip with bounded memory
+
+        Raw-layout inputs (uncompressed TIFF, BMP, PPM, or headerless ``.raw``
+        files described by ``raw_shape=(height, width)`` and ``raw_mode``) are
+        read through ``numpy.memmap``.  The output is an uncompressed TIFF (or
+        headerless raw file) written one strip at a time, so peak memory is
+        proportional to ``strip_height * width`` rather than the image size.
+        """
+        strip_height = strip_height or self.strip_height
+        reader = open_image_strips(source, strip_height, raw_shape=raw_shape, raw_mode=raw_mode)
+        width, height, mode = reader["width"], reader["height"], reader["mode"]
+
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        temp_path = f"{destination}.tmp-{os.getpid()}"
+        strips = 0
+        with open(temp_path, "wb") as output:
+            if not destination.lower().endswith((".raw", ".rgb")):
+                output.write(_build_tiff_header(width, height, len(mode), strip_height))
+            for top, pixels in reader["strips"]:
+                premultiplied, inverse_alpha = self.overlay_region(top, top + len(pixels), 0, width)
+                output.write(self.composite(pixels, premultiplied, inverse_alpha).tobytes())
+                strips += 1
+        os.replace(temp_path, destination)
+
+        return {
+            "source": source,
+            "destination": destination,
+            "width": width,
+            "height": height,
+            "strips": strips,
+            "strip_height": strip_height,
+            "reader": reader["reader"],
+            "status": "WATERMARKED"
+        }
+
+
+@contextmanager
+def _open_lazily(path: str):
+    """Open an image header without Pillow's decompression-bomb limit"""
+    limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        with Image.open(path) as image:
+            yield image
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+def _raw_segments(image: Image.Image) -> Optional[Tuple[str, List[Tuple[int, int, int, int, int]]]]:
+    """Describe every raw tile of an image as a mappable file region, if the layout allows it"""
+    width, _ = image.size
+    segments = []
+    layout = None
+    for tile in image.tile:
+        codec, (x0, y0, x1, y1), offset, args = tuple(tile)
+        rawmode, stride, orientation = (args, 0, 1) if isinstance(args, str) else tuple(args)[:3]
+        if codec != "raw" or x0 != 0 or x1 != width or rawmode not in RAW_LAYOUTS:
+            return None
+        if layout not in (None, rawmode):
+            return None
+        layout = rawmode
+        stride = stride or width * RAW_LAYOUTS[rawmode][0]
+        segments.append((y0, y1, offset, stride, orientation))
+    return (layout, sorted(segments)) if segments else None
+
+
+def _memmap_strips(path: str, segments: List[Tuple[int, int, int, int, int]], rawmode: str,
+                   width: int, height: int, strip_height: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield RGB(A) strips read through short-lived memory maps of raw segments
+
+    Each strip maps only its own rows and drops the mapping afterwards, so
+    resident memory stays at one strip however large the file is.
+    """
+    bytes_per_pixel, channels = RAW_LAYOUTS[rawmode]
+    for top in range(0, height, strip_height):
+        bottom = min(top + strip_height, height)
+        parts = []
+        for y0, y1, offset, stride, orientation in segments:
+            if y1 <= top or y0 >= bottom:
+                continue
+            first, last = max(top, y0) - y0, min(bottom, y1) - y0
+            if orientation < 0:
+                first, last = (y1 - y0) - last, (y1 - y0) - first
+            rows = np.memmap(path, dtype=np.uint8, mode="r", offset=offset + first * stride,
+                             shape=(last - first, stride))
+            if orientation < 0:
+                rows = rows[::-1]
+            part = rows[:, :width * bytes_per_pixel].reshape(-1, width, bytes_per_pixel)[..., channels]
+            parts.append(part)
+            del rows
+        yield top, np.ascontiguousarray(np.concatenate(parts) if len(parts) > 1 else parts[0])
+
+
+def _decoded_strips(pixels: np.ndarray, strip_height: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield strips of an already decoded image"""
+    for top in range(0, pixels.shape[0], strip_height):
+        yield top, pixels[top:top + strip_height]
+
+
+def open_image_strips(path: str, strip_height: int, raw_shape: Optional[Tuple[int, int]] = None,
+                      raw_mode: str = "RGB") -> Dict[str, Any]:
+    """Open an image as a lazy sequence of horizontal RGB(A) strips"""
+    if raw_shape is not None:
+        height, width = raw_shape
+        segments = [(0, height, 0, width * RAW_LAYOUTS[raw_mode][0], 1)]
+        mode = "RGBA" if raw_mode in ("RGBA", "BGRA") else "RGB"
+        return {
+            "width": width,
+            "height": height,
+            "mode": mode,
+            "reader": "memmap",
+            "strips": _memmap_strips(path, segments, raw_mode, width, height, strip_height)
+        }
+
+    with _open_lazily(path) as image:
+        width, height = image.size
+        mapped = _raw_segments(image)
+        if mapped is not None:
+            rawmode, segments = mapped
+            mode = "RGBA" if rawmode in ("RGBA", "BGRA") else "RGB"
+            return {
+                "width": width,
+                "height": height,
+                "mode": mode,
+                "reader": "memmap",
+                "strips": _memmap_strips(path, segments, rawmode, width, height, strip_height)
+            }
+
+        # Compressed single-stream formats (PNG, JPEG, deflate TIFF) cannot be
+        # entered mid-stream by Pillow, so they are decoded once up front.
+        logging.warning(f"⚠️ {path} is not a raw layout; decoding the full image in memory")
+        mode = "RGBA" if "A" in image.getbands() else "RGB"
+        pixels = np.asarray(image.convert(mode))
+    return {
+        "width": width,
+        "height": height,
+        "mode": mode,
+        "reader": "decoded",
+        "strips": _decoded_strips(pixels, strip_height)
+    }
+
+
+def _build_tiff_header(width: int, height: int, channels: int, rows_per_strip: int,
+                       bigtiff: Optional[bool] = None) -> bytes:
+    """Build a baseline uncompressed TIFF header whose pixel data follows contiguously
+
+    Classic TIFF is used while all offsets fit in 32 bits, BigTIFF beyond that.
+    """
+    strip_count = -(-height // rows_per_strip)
+    row_bytes = width * channels
+    data_size = row_bytes * height
+    big = data_size + 64 * 1024 + strip_count * 16 >= 2 ** 32 if bigtiff is None else bigtiff
+
+    offset_format, count_format, entry_size, offset_type = ("Q", "Q", 20, 16) if big else ("I", "I", 12, 4)
+    entries = [
+        (256, 4, 1, width),
+        (257, 4, 1, height),
+        (258, 3, channels, None),
+        (259, 3, 1, 1),
+        (262, 3, 1, 2),
+        (273, offset_type, strip_count, None),
+        (277, 3, 1, channels),
+        (278, 4, 1, rows_per_strip),
+        (279, offset_type, strip_count, None),
+        (284, 3, 1, 1),
+    ]
+    if channels == 4:
+        entries.append((338, 3, 1, 2))
+
+    header_size = 16 if big else 8
+    ifd_size = (8 if big else 2) + len(entries) * entry_size + (8 if big else 4)
+    bits_offset = header_size + ifd_size
+    strip_offsets_offset = bits_offset + 2 * channels
+    strip_counts_offset = strip_offsets_offset + strip_count * (8 if big else 4)
+    data_offset = strip_counts_offset + strip_count * (8 if big else 4)
+
+    strip_offsets = [data_offset + row_bytes * top for top in range(0, height, rows_per_strip)]
+    strip_counts = [row_bytes * (min(top + rows_per_strip, height) - top)
+                    for top in range(0, height, rows_per_strip)]
+
+    inline_size = 8 if big else 4
+    out = bytearray(b"II" + (struct.pack("<HHHQ", 43, 8, 0, header_size) if big else struct.pack("<HI", 42, header_size)))
+    out += struct.pack("<Q" if big else "<H", len(entries))
+    for tag, field_type, count, value in entries:
+        out += struct.pack(f"<HH{count_format}", tag, field_type, count)
+        if tag == 258:
+            value_bytes = struct.pack(f"<{count_format}", bits_offset) if channels * 2 > inline_size \
+                else struct.pack(f"<{channels}H", *[8] * channels)
+        elif tag in (273, 279) and strip_count * (8 if big else 4) > inline_size:
+            value_bytes = struct.pack(f"<{offset_format}", strip_offsets_offset if tag == 273 else strip_counts_offset)
+        elif tag in (273, 279):
+            value_bytes = struct.pack(f"<{offset_format}", (strip_offsets if tag == 273 else strip_counts)[0])
+        elif field_type == 3:
+            value_bytes = struct.pack("<H", value)
+        else:
+            value_bytes = struct.pack("<I", value)
+        out += value_bytes.ljust(inline_size, b"\0")
+    out += struct.pack(f"<{offset_format}", 0)
+
+    out += struct.pack(f"<{channels}H", *[8] * channels)
+    out += struct.pack(f"<{strip_count}{offset_format}", *strip_offsets)
+    out += struct.pack(f"<{strip_count}{offset_format}", *strip_counts)
+    return bytes(out)
+
+
+def _load_pixels(path: str, mode: str) -> np.ndarray:
+    """Decode an image file into a uint8 array in the given mode"""
+    with Image.open(path) as image:
+        return np.asarray(image.convert(mode))
+
+
+_worker_engine: Optional[ImageWatermarkingEngine] = None
+
+
+def _init_worker(engine_options: Dict[str, Any]):
+    """Create one engine per worker process so its overlay cache is reused"""
+    global _worker_engine
+    _worker_engine = ImageWatermarkingEngine(**engine_options)
+
+
+def _watermark_files_worker(files: List[Tuple[str, str]], batch_size: int) -> List[Dict[str, Any]]:
+    """Process-pool entry point for a chunk of files"""
+    return _worker_engine.watermark_files(files, batch_size=batch_size)
+
+
+def watermark_directory(source_dir: str, destination_dir: str, workers: Optional[int] = None,
+                        batch_size: int = 8, files_per_task: int = 32,
+                        **engine_options) -> Dict[str, Any]:
+    """Watermark every image in a directory tree across a process pool"""
+    files = []
+    for root, _, names in os.walk(source_dir):
+        for name in sorted(names):
+            if name.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS):
+                source = os.path.join(root, name)
+                destination = os.path.join(destination_dir, os.path.relpath(source, source_dir))
+                files.append((source, destination))
+
+    start = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(engine_options,)) as executor:
+        chunks = [files[i:i + files_per_task] for i in range(0, len(files), files_per_task)]
+        for chunk_results in executor.map(_watermark_files_worker, chunks, [batch_size] * len(chunks)):
+            results.extend(chunk_results)
+    elapsed = time.perf_counter() - start
+
+    megapixels = sum(r["width"] * r["height"] for r in results) / 1e6
+    logging.info(f"🖼️ Watermarked {len(results)} images in {elapsed:.2f}s")
+    return {
+        "images_processed": len(results),
+        "megapixels": megapixels,
+        "elapsed_seconds": elapsed,
+        "megapixels_per_second": megapixels / elapsed if elapsed else 0.0,
+        "results": results
+    }
+
+
+def benchmark_image_watermarking(width: int = 1920, height: int = 1080, batch_size: int = 8,
+                                 rounds: int = 5) -> Dict[str, Any]:
+    """Benchmark in-memory batch compositing throughput in megapixels per second"""
+    engine = ImageWatermarkingEngine()
+    rng = np.random.default_rng(2025)
+    batch = rng.integers(0, 256, size=(batch_size, height, width, 3), dtype=np.uint8)
+    engine.composite_batch(batch)  # warm the overlay cache
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        engine.composite_batch(batch)
+    elapsed = time.perf_counter() - start
+
+    megapixels = width * height * batch_size * rounds / 1e6
+    return {
+        "resolution": f"{width}x{height}",
+        "batch_size": batch_size,
+        "rounds": rounds,
+        "elapsed_seconds": elapsed,
+        "megapixels_per_second": megapixels / elapsed
+    }
+
+
+if __name__ == "__main__":
+    report = benchmark_image_watermarking()
+    print("🖼️ IMAGE WATERMARKING BENCHMARK")
+    print(f"Resolution: {report['resolution']} x {report['batch_size']} per batch")
+    print(f"Throughput: {report['megapixels_per_second']:.1f} MP/s")
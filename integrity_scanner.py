@@ -0,0 +1,248 @@
+"""
+Incremental Source Integrity Scanner
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Signed baselines of the deployment tree, checked fast enough for readiness probes
+
+Every regular file under the root is hashed with SHA-256 on a thread pool.
+Digests are cached by path together with ``(inode, size, mtime_ns)``, so
+a rescan only reads files whose metadata changed.  As in git's index,
+files modified within ``RACY_SECONDS`` of a scan are not cached, because
+a later write in the same timestamp tick would go unnoticed.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+BASELINE_FORMAT = "integrity-baseline-v1"
+CACHE_FILE_NAME = ".integrity_cache.json"
+BASELINE_FILE_NAME = ".integrity_baseline.json"
+DEFAULT_EXCLUDES = (".git", "__pycache__", ".pytest_cache", "node_modules", ".venv", "venv",
+                    CACHE_FILE_NAME, BASELINE_FILE_NAME)
+RACY_SECONDS = 2.0
+
+
+def _hash_file(path: str, buffer_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as handle:
+        while True:
+            read = handle.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+def tree_digest(files: Dict[str, str]) -> str:
+    """Single digest over a sorted path -> digest mapping"""
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        digest.update(f"{path}\0{files[path]}\n".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+def _baseline_message(baseline: Dict[str, Any]) -> bytes:
+    signed = {key: baseline[key] for key in ("format", "created", "file_count", "tree_digest")}
+    return json.dumps(signed, sort_keys=True, separators=(",", ":")).encode()
+
+
+class IntegrityScanner:
+    """Hash a deployment tree with a metadata cache and compare it against a signed baseline"""
+
+    def __init__(self, root: str, cache_path: Optional[str] = None, threads: Optional[int] = None,
+                 excludes: Sequence[str] = DEFAULT_EXCLUDES):
+        self.owner = "Ervin Remus Radosavlevici"
+        self.contact = "radosavlevici210@icloud.com"
+        self.root = os.path.abspath(root)
+        self.cache_path = cache_path or os.path.join(self.root, CACHE_FILE_NAME)
+        self.threads = threads or min(32, (os.cpu_count() or 1) * 4)
+        self.excludes = set(excludes)
+        self._cache: Dict[str, List[Any]] = self._load_cache()
+
+    def _load_cache(self) -> Dict[str, List[Any]]:
+        try:
+            with open(self.cache_path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        temp_path = f"{self.cache_path}.tmp-{os.getpid()}"
+        try:
+            with open(temp_path, "w") as handle:
+                json.dump(self._cache, handle, separators=(",", ":"))
+            os.replace(temp_path, self.cache_path)
+        except OSError as error:
+            logging.warning(f"🛡️ Could not write integrity cache {self.cache_path}: {error}")
+
+    def _walk(self) -> List[Tuple[str, os.stat_result]]:
+        """Relative path and stat of every regular file, using scandir's cached entry types"""
+        found = []
+        pending = [self.root]
+        while pending:
+            directory = pending.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as error:
+                logging.warning(f"🛡️ Cannot list {directory}: {error}")
+                continue
+            for entry in entries:
+                if entry.name in self.excludes:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    found.append((os.path.relpath(entry.path, self.root), entry.stat(follow_symlinks=False)))
+        return found
+
+    def scan(self) -> Dict[str, Any]:
+        """Digest of every file; only files whose (inode, size, mtime_ns) changed are read"""
+        start = time.perf_counter()
+        now_ns = time.time_ns()
+        files: Dict[str, str] = {}
+        to_hash: List[Tuple[str, os.stat_result]] = []
+        for path, stat in self._walk():
+            key = [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+            cached = self._cache.get(path)
+            if cached is not None and cached[:3] == key:
+                files[path] = cached[3]
+            else:
+                to_hash.append((path, stat))
+
+        def hash_entry(item: Tuple[str, os.stat_result]) -> Optional[str]:
+            try:
+                return _hash_file(os.path.join(self.root, item[0]))
+            except OSError as error:
+                logging.warning(f"🛡️ Cannot read {item[0]}: {error}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            digests = list(executor.map(hash_entry, to_hash))
+
+        cache_changed = len(self._cache) != len(files) + len(to_hash)
+        for (path, stat), digest in zip(to_hash, digests):
+            if digest is None:
+                continue
+            files[path] = digest
+            if now_ns - stat.st_mtime_ns > RACY_SECONDS * 1e9:
+                self._cache[path] = [stat.st_ino, stat.st_size, stat.st_mtime_ns, digest]
+                cache_changed = True
+            else:
+                self._cache.pop(path, None)
+        for path in [path for path in self._cache if path not in files]:
+            del self._cache[path]
+            cache_changed = True
+        if cache_changed:
+            self._save_cache()
+
+        return {
+            "files": files,
+            "files_scanned": len(files),
+            "files_hashed": len(to_hash),
+            "bytes_hashed": sum(stat.st_size for _, stat in to_hash),
+            "elapsed_seconds": time.perf_counter() - start
+        }
+
+    def create_baseline(self, signer=None) -> Dict[str, Any]:
+        """Baseline of the current tree, Ed25519-signed when a signer is given"""
+        files = self.scan()["files"]
+        baseline = {
+            "format": BASELINE_FORMAT,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "file_count": len(files),
+            "tree_digest": tree_digest(files),
+            "files": files
+        }
+        if signer is not None:
+            from ownership_signing import public_key_bytes
+            baseline["signature"] = {
+                "algorithm": "Ed25519",
+                "key_id": signer.key_id,
+                "public_key": base64.b64encode(public_key_bytes(signer.public_key)).decode(),
+                "value": base64.b64encode(signer.sign(_baseline_message(baseline))).decode()
+            }
+        return baseline
+
+    def verify(self, baseline: Dict[str, Any], public_key: Optional[Union[bytes, str]] = None) -> Dict[str, Any]:
+        """Compare the tree with a baseline and check the baseline's signature
+
+        ``public_key`` (raw or base64) is the trusted signing key; without
+        it the key embedded in the baseline is used and the result says so.
+        """
+        if baseline.get("format") != BASELINE_FORMAT:
+            raise ValueError("Not an integrity baseline")
+        scan = self.scan()
+        current, expected = scan["files"], baseline["files"]
+        added = sorted(path for path in current if path not in expected)
+        removed = sorted(path for path in expected if path not in current)
+        modified = sorted(path for path in current if path in expected and current[path] != expected[path])
+
+        signature = baseline.get("signature")
+        consistent = tree_digest(expected) == baseline["tree_digest"] and len(expected) == baseline["file_count"]
+        if signature is None:
+            signature_valid = False
+        else:
+            from ownership_signing import verify_signature
+            signature_valid = consistent and verify_signature(
+                _baseline_message(baseline), base64.b64decode(signature["value"]),
+                public_key if public_key is not None else signature["public_key"])
+
+        intact = not (added or removed or modified)
+        if not intact:
+            logging.warning(f"🛡️ Integrity drift: {len(added)} added, {len(removed)} removed, "
+                            f"{len(modified)} modified")
+        return {
+            "status": "INTACT" if intact and signature_valid else ("UNSIGNED" if intact else "MODIFIED"),
+            "signature_valid": signature_valid,
+            "trusted_key": public_key is not None,
+            "added": added,
+            "removed": removed,
+            "modified": modified,
+            "files_scanned": scan["files_scanned"],
+            "files_hashed": scan["files_hashed"],
+            "elapsed_seconds": scan["elapsed_seconds"]
+        }
+
+
+def save_baseline(baseline: Dict[str, Any], path: str):
+    """Write a baseline as JSON via a temporary file and atomic rename"""
+    temp_path = f"{path}.tmp-{os.getpid()}"
+    with open(temp_path, "w") as handle:
+        json.dump(baseline, handle, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path) as handle:
+        return json.load(handle)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ("baseline", "verify"):
+        print("Usage: python integrity_scanner.py baseline|verify <directory>")
+        sys.exit(1)
+    scanner = IntegrityScanner(sys.argv[2])
+    baseline_path = os.path.join(scanner.root, BASELINE_FILE_NAME)
+    if sys.argv[1] == "baseline":
+        from ownership_signing import OwnershipSigner
+        baseline = scanner.create_baseline(OwnershipSigner())
+        save_baseline(baseline, baseline_path)
+        print(f"🛡️ Baseline of {baseline['file_count']} files written to {baseline_path}")
+    else:
+        report = scanner.verify(load_baseline(baseline_path))
+        print(f"🛡️ {report['status']}: {len(report['added'])} added, {len(report['removed'])} removed, "
+              f"{len(report['modified'])} modified ({report['files_hashed']}/{report['files_scanned']} hashed "
+              f"in {report['elapsed_seconds']:.2f}s)")
+        sys.exit(0 if report["status"] == "INTACT" else 1)
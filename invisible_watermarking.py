@@ -0,0 +1,237 @@
+"""
+Invisible DCT-Domain Image Watermarking
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Digital fingerprinting and watermark removal detection for image assets
+"""
+
+import math
+import time
+import hashlib
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from copyright_protection import CopyrightProtection
+
+BLOCK_SIZE = 8
+
+# Mid-frequency coefficients: robust to mild compression, invisible to the eye
+MID_FREQUENCY_POSITIONS = (
+    (0, 3), (1, 2), (2, 1), (3, 0),
+    (0, 4), (1, 3), (2, 2), (3, 1), (4, 0),
+    (1, 4), (2, 3), (3, 2), (4, 1),
+)
+
+
+def _dct_matrix(size: int = BLOCK_SIZE) -> np.ndarray:
+    """Orthonormal DCT-II basis so that coefficients = D @ block @ D.T"""
+    k = np.arange(size)[:, np.newaxis]
+    n = np.arange(size)[np.newaxis, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * math.sqrt(2.0 / size)
+    matrix[0] /= math.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+DCT_MATRIX = _dct_matrix()
+
+
+def _normal_cdf(z: float) -> float:
+    """Standard normal cumulative distribution"""
+    return 0.5 * (1.0 + math.erf(z / math.sqrt(2.0)))
+
+
+def payload_from_signature(signature: Dict[str, Any]) -> np.ndarray:
+    """Derive the 64-bit payload from an ownership signature's verification code"""
+    code = int(signature["verification_code"], 16)
+    return np.array([(code >> (63 - i)) & 1 for i in range(64)], dtype=np.uint8)
+
+
+def payload_to_code(bits: np.ndarray) -> str:
+    """Convert payload bits back to an upper-case verification code"""
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:0{len(bits) // 4}X}"
+
+
+class InvisibleWatermarker:
+    """Keyed spread-spectrum watermark in the 8x8 block-DCT domain
+
+    Every block carries one payload bit, spread over the mid-frequency
+    coefficients with a keyed +/-1 pattern.  All blocks are transformed at
+    once with batched matrix products, so embedding and detection never
+    loop over blocks in Python.
+    """
+
+    def __init__(self, key: Optional[str] = None, strength: float = 3.0,
+                 payload_bits: int = 64, detection_threshold: float = 0.999):
+        self.owner = "Ervin Remus Radosavlevici"
+        self.contact = "radosavlevici210@icloud.com"
+        self.orcid = "0009-0000-9787-510X"
+        self.key = key or f"{self.owner}|{self.contact}|{self.orcid}"
+        self.strength = strength
+        self.payload_bits = payload_bits
+        self.detection_threshold = detection_threshold
+        self._rows = np.array([position[0] for position in MID_FREQUENCY_POSITIONS])
+        self._cols = np.array([position[1] for position in MID_FREQUENCY_POSITIONS])
+        self._pattern_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _patterns(self, block_count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Keyed bit assignment and +/-1 spreading pattern for a block count"""
+        patterns = self._pattern_cache.get(block_count)
+        if patterns is None:
+            seed = int.from_bytes(hashlib.sha256(self.key.encode()).digest()[:8], "big")
+            rng = np.random.default_rng(seed)
+            assignment = np.empty(block_count, dtype=np.int64)
+            assignment[rng.permutation(block_count)] = np.arange(block_count) % self.payload_bits
+            spreading = rng.choice(np.array([-1.0, 1.0], dtype=np.float32),
+                                   size=(block_count, len(MID_FREQUENCY_POSITIONS)))
+            patterns = (assignment, spreading)
+            self._pattern_cache = {block_count: patterns}
+        return patterns
+
+    @staticmethod
+    def _luma_blocks(pixels: np.ndarray) -> np.ndarray:
+        """Luma of the block-aligned area, shaped (blocks_y, blocks_x, 8, 8)"""
+        height = pixels.shape[0] // BLOCK_SIZE * BLOCK_SIZE
+        width = pixels.shape[1] // BLOCK_SIZE * BLOCK_SIZE
+        area = pixels[:height, :width].astype(np.float32)
+        if area.ndim == 3:
+            luma = area[..., 0] * 0.299 + area[..., 1] * 0.587 + area[..., 2] * 0.114
+        else:
+            luma = area
+        blocks = luma.reshape(height // BLOCK_SIZE, BLOCK_SIZE, width // BLOCK_SIZE, BLOCK_SIZE)
+        return blocks.transpose(0, 2, 1, 3)
+
+    def embed(self, pixels: np.ndarray, payload: np.ndarray) -> np.ndarray:
+        """Embed payload bits into a uint8 (H, W) or (H, W, C) image"""
+        if len(payload) != self.payload_bits:
+            raise ValueError(f"Payload must contain {self.payload_bits} bits")
+        blocks = self._luma_blocks(pixels)
+        blocks_y, blocks_x = blocks.shape[:2]
+        if blocks_y * blocks_x < self.payload_bits:
+            raise ValueError("Image is too small to carry the payload")
+
+        assignment, spreading = self._patterns(blocks_y * blocks_x)
+        signs = np.where(np.asarray(payload)[assignment] > 0, 1.0, -1.0).astype(np.float32)
+
+        delta = np.zeros((blocks_y * blocks_x, BLOCK_SIZE, BLOCK_SIZE), dtype=np.float32)
+        delta[:, self._rows, self._cols] = self.strength * signs[:, np.newaxis] * spreading
+        # Inverse DCT of the coefficient change gives the spatial change directly
+        spatial = DCT_MATRIX.T @ delta @ DCT_MATRIX
+        spatial = spatial.reshape(blocks_y, blocks_x, BLOCK_SIZE, BLOCK_SIZE).transpose(0, 2, 1, 3)
+        spatial = spatial.reshape(blocks_y * BLOCK_SIZE, blocks_x * BLOCK_SIZE)
+
+        result = pixels.copy()
+        area = result[:blocks_y * BLOCK_SIZE, :blocks_x * BLOCK_SIZE].astype(np.float32)
+        if area.ndim == 3:
+            # Equal change on R, G and B changes luma by exactly the same amount
+            area[..., :3] += spatial[..., np.newaxis]
+        else:
+            area += spatial
+        np.clip(np.rint(area), 0, 255, out=area)
+        result[:blocks_y * BLOCK_SIZE, :blocks_x * BLOCK_SIZE] = area
+        return result
+
+    def _bit_statistics(self, pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-bit correlation sums and their empirical standard deviations"""
+        blocks = self._luma_blocks(pixels)
+        blocks_y, blocks_x = blocks.shape[:2]
+        coefficients = DCT_MATRIX @ blocks.reshape(-1, BLOCK_SIZE, BLOCK_SIZE) @ DCT_MATRIX.T
+
+        assignment, spreading = self._patterns(blocks_y * blocks_x)
+        correlation = np.einsum("ij,ij->i", coefficients[:, self._rows, self._cols], spreading)
+        sums = np.bincount(assignment, weights=correlation, minlength=self.payload_bits)
+        energy = np.bincount(assignment, weights=correlation ** 2, minlength=self.payload_bits)
+        return sums, np.sqrt(np.maximum(energy, 1e-12))
+
+    def detect(self, pixels: np.ndarray, expected_payload: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Detect the watermark and return the extracted payload with a confidence score
+
+        With ``expected_payload`` the confidence is the one-sided probability
+        that the combined correlation is not chance.  Without it, the blind
+        confidence comes from a chi-square test over all per-bit z-scores.
+        """
+        sums, deviations = self._bit_statistics(pixels)
+        z_scores = sums / deviations
+        bits = (sums > 0).astype(np.uint8)
+
+        result = {
+            "payload": bits,
+            "verification_code": payload_to_code(bits),
+            "bit_z_scores": z_scores,
+        }
+
+        if expected_payload is not None:
+            expected_signs = np.where(np.asarray(expected_payload) > 0, 1.0, -1.0)
+            z_total = float(np.sum(expected_signs * sums) / math.sqrt(np.sum(deviations ** 2)))
+            confidence = _normal_cdf(z_total)
+            result["bit_error_rate"] = float(np.mean(bits != np.asarray(expected_payload)))
+        else:
+            # Wilson-Hilferty approximation of the chi-square CDF
+            k = float(self.payload_bits)
+            statistic = float(np.sum(z_scores ** 2)) / k
+            z_total = (statistic ** (1.0 / 3.0) - (1.0 - 2.0 / (9.0 * k))) / math.sqrt(2.0 / (9.0 * k))
+            confidence = _normal_cdf(z_total)
+
+        result["z_score"] = z_total
+        result["confidence"] = confidence
+        result["detected"] = confidence >= self.detection_threshold
+        return result
+
+
+def embed_ownership_watermark(pixels: np.ndarray, data: Any,
+                              watermarker: Optional[InvisibleWatermarker] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Embed an invisible mark carrying the ownership signature of ``data``"""
+    watermarker = watermarker or InvisibleWatermarker()
+    signature = CopyrightProtection().create_ownership_signature(data)
+    return watermarker.embed(pixels, payload_from_signature(signature)), signature
+
+
+def detect_ownership_watermark(pixels: np.ndarray, signature: Optional[Dict[str, Any]] = None,
+                               watermarker: Optional[InvisibleWatermarker] = None) -> Dict[str, Any]:
+    """Detect an invisible ownership mark, optionally against a known signature"""
+    watermarker = watermarker or InvisibleWatermarker()
+    expected = payload_from_signature(signature) if signature is not None else None
+    return watermarker.detect(pixels, expected)
+
+
+def benchmark_invisible_watermarking(width: int = 4000, height: int = 3000, rounds: int = 3) -> Dict[str, Any]:
+    """Benchmark embed and detect throughput on 12MP images"""
+    watermarker = InvisibleWatermarker()
+    rng = np.random.default_rng(2025)
+    pixels = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    payload = rng.integers(0, 2, size=watermarker.payload_bits, dtype=np.uint8)
+    watermarked = watermarker.embed(pixels, payload)  # warm the pattern cache
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        watermarked = watermarker.embed(pixels, payload)
+    embed_seconds = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        detection = watermarker.detect(watermarked, payload)
+    detect_seconds = (time.perf_counter() - start) / rounds
+
+    megapixels = width * height / 1e6
+    return {
+        "resolution": f"{width}x{height}",
+        "embed_seconds": embed_seconds,
+        "detect_seconds": detect_seconds,
+        "embed_megapixels_per_second": megapixels / embed_seconds,
+        "detect_megapixels_per_second": megapixels / detect_seconds,
+        "confidence": detection["confidence"],
+        "bit_error_rate": detection["bit_error_rate"]
+    }
+
+
+if __name__ == "__main__":
+    report = benchmark_invisible_watermarking()
+    print("🔍 INVISIBLE WATERMARK BENCHMARK")
+    print(f"Resolution: {report['resolution']}")
+    print(f"Embed: {report['embed_seconds'] * 1000:.0f} ms ({report['embed_megapixels_per_second']:.1f} MP/s)")
+    print(f"Detect: {report['detect_seconds'] * 1000:.0f} ms ({report['detect_megapixels_per_second']:.1f} MP/s)")
+    print(f"Confidence: {report['confidence']:.6f}")
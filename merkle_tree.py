@@ -0,0 +1,143 @@
+"""
+Merkle Tree Inclusion Proofs
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Compact proofs that chunks or files belong to a protected backup
+
+The tree has the RFC 6962 shape used by ``tree_hashing``: leaves are
+``SHA-256(0x00 || item digest)`` and interior nodes are
+``SHA-256(0x01 || left || right)``, splitting ``n`` leaves at the largest
+power of two below ``n``.  A proof for the contiguous leaves
+``[start, end)`` lists, left to right, the hashes of the maximal subtrees
+that lie outside the range; there are at most about ``2 log2(n)`` of
+them, whatever the size of the range.
+"""
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from tree_hashing import LEAF_PREFIX, NODE_PREFIX, merkle_tree_root
+
+MERKLE_PROOF_FORMAT = "rfc6962-range-v1"
+
+
+def leaf_hash(item_digest: bytes) -> bytes:
+    """Leaf for an item identified by its SHA-256 digest"""
+    return hashlib.sha256(LEAF_PREFIX + item_digest).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def _split(size: int) -> int:
+    return 1 << ((size - 1).bit_length() - 1)
+
+
+class MerkleTree:
+    """Merkle tree over item digests with range inclusion proofs"""
+
+    def __init__(self, item_digests: Sequence[bytes]):
+        if not item_digests:
+            raise ValueError("A Merkle tree needs at least one leaf")
+        self.leaves = [leaf_hash(digest) for digest in item_digests]
+        self._nodes: Dict[Tuple[int, int], bytes] = {}
+        self._root = self._node(0, len(self.leaves))
+
+    def _node(self, low: int, high: int) -> bytes:
+        """Hash of the subtree over leaves [low, high), memoised for proof generation"""
+        if high - low == 1:
+            return self.leaves[low]
+        cached = self._nodes.get((low, high))
+        if cached is None:
+            middle = low + _split(high - low)
+            cached = _node_hash(self._node(low, middle), self._node(middle, high))
+            self._nodes[(low, high)] = cached
+        return cached
+
+    @property
+    def root(self) -> bytes:
+        return self._root
+
+    def __len__(self) -> int:
+        return len(self.leaves)
+
+    def range_proof(self, start: int, end: int) -> List[bytes]:
+        """Hashes of the subtrees outside leaves [start, end), left to right"""
+        if not 0 <= start < end <= len(self.leaves):
+            raise ValueError(f"Leaf range [{start}, {end}) is outside a tree of {len(self.leaves)} leaves")
+        proof: List[bytes] = []
+
+        def collect(low: int, high: int):
+            if high <= start or low >= end:
+                proof.append(self._node(low, high))
+            elif not (start <= low and high <= end):
+                middle = low + _split(high - low)
+                collect(low, middle)
+                collect(middle, high)
+
+        collect(0, len(self.leaves))
+        return proof
+
+    def inclusion_proof(self, index: int) -> List[bytes]:
+        """Audit path of a single leaf"""
+        return self.range_proof(index, index + 1)
+
+
+def root_from_range_proof(item_digests: Sequence[bytes], start: int, leaf_count: int,
+                          proof: Sequence[bytes]) -> Optional[bytes]:
+    """Recompute the root from the items of [start, start + len(items)) and a range proof
+
+    Returns ``None`` if the proof does not have the shape required for that range.
+    """
+    end = start + len(item_digests)
+    if not item_digests or not 0 <= start < end <= leaf_count:
+        return None
+    leaves = [leaf_hash(digest) for digest in item_digests]
+    remaining = list(proof)
+    position = [0]
+
+    def rebuild(low: int, high: int) -> Optional[bytes]:
+        if high <= start or low >= end:
+            if position[0] >= len(remaining):
+                return None
+            position[0] += 1
+            return remaining[position[0] - 1]
+        if high - low == 1:
+            return leaves[low - start]
+        middle = low + _split(high - low)
+        left = rebuild(low, middle)
+        right = rebuild(middle, high)
+        return None if left is None or right is None else _node_hash(left, right)
+
+    root = rebuild(0, leaf_count)
+    return root if position[0] == len(remaining) else None
+
+
+def verify_range_proof(item_digests: Sequence[bytes], start: int, leaf_count: int,
+                       proof: Sequence[bytes], root: bytes) -> bool:
+    """Whether the items really sit at [start, start + len(items)) of the tree with this root"""
+    return root_from_range_proof(item_digests, start, leaf_count, proof) == root
+
+
+def verify_items_parallel(item_digests: Sequence[bytes], root: bytes,
+                          load_digest: Callable[[int], bytes], threads: Optional[int] = None
+                          ) -> Dict[str, object]:
+    """Full-tree audit: recompute every item's digest on a thread pool and the root from them
+
+    ``load_digest(index)`` reads item ``index`` and returns the SHA-256 of
+    its content; hashing and decompression release the GIL, so items are
+    checked in parallel.
+    """
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        actual = list(executor.map(load_digest, range(len(item_digests))))
+    corrupt = [index for index, (expected, found) in enumerate(zip(item_digests, actual)) if expected != found]
+    recomputed = merkle_tree_root([leaf_hash(digest) for digest in actual])
+    return {
+        "verified": not corrupt and recomputed == root,
+        "items_checked": len(actual),
+        "corrupt_items": corrupt,
+        "root_matches": recomputed == root
+    }
@@ -0,0 +1,107 @@
+"""
+Streaming Ownership Marker Scanner
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Single-pass, case-insensitive search for ownership markers in large inputs
+"""
+
+import re
+from collections.abc import Mapping
+from typing import Dict, Any, FrozenSet, Iterator, List, Set, Union
+
+CHUNK_SIZE = 1024 * 1024
+WINDOW_SIZE = 64 * 1024
+
+Chunk = Union[str, bytes, bytearray, memoryview]
+
+
+def iter_chunks(data: Any, chunk_size: int = CHUNK_SIZE) -> Iterator[Chunk]:
+    """Text or byte chunks of ``data`` without materializing it
+
+    Strings and bytes-like objects are yielded whole, file-like objects are
+    read ``chunk_size`` at a time, and any other iterable (except mappings)
+    is treated as a sequence of chunks.  Everything else falls back to
+    ``str(data)`` as before.
+    """
+    if isinstance(data, (str, bytes, bytearray, memoryview)):
+        yield data
+    elif hasattr(data, "read"):
+        while True:
+            chunk = data.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    elif isinstance(data, Mapping) or not hasattr(data, "__iter__"):
+        yield str(data)
+    else:
+        for chunk in data:
+            yield chunk if isinstance(chunk, (str, bytes, bytearray, memoryview)) else str(chunk)
+
+
+class OwnershipMarkerScanner:
+    """Find every marker of a fixed set in one case-insensitive pass
+
+    The lower-cased markers are compiled into one alternation per kind of
+    input (text and bytes), which the regular expression engine runs as a
+    single automaton.  The input is lower-cased one cache-sized window at
+    a time, so memory stays bounded however large the input is.  Once a
+    marker has been seen it is dropped from the alternation, the scan
+    resumes at the same position, and it stops as soon as no marker is
+    left.  The last ``longest marker - 1`` characters of each window are
+    carried into the next one, so markers split across chunk or window
+    boundaries are still found.
+    """
+
+    def __init__(self, markers: Dict[str, str], window_size: int = WINDOW_SIZE):
+        self.markers = {name: marker.lower() for name, marker in markers.items()}
+        self.window_size = window_size
+        self._names_by_marker: Dict[str, List[str]] = {}
+        for name, marker in self.markers.items():
+            self._names_by_marker.setdefault(marker, []).append(name)
+        self._overlap = max((len(marker.encode("utf-8")) for marker in self.markers.values()), default=1) - 1
+        self._patterns: Dict[Any, Any] = {}
+        everything = frozenset(self.markers)
+        self._pattern(str, everything)
+        self._pattern(bytes, everything)
+
+    def _pattern(self, kind: type, names: FrozenSet[str]):
+        """Compiled alternation for the markers still being searched for"""
+        key = (kind, names)
+        pattern = self._patterns.get(key)
+        if pattern is None:
+            # Plain alternatives (no groups) keep the engine's first-character prefilter
+            wanted = sorted({self.markers[name] for name in names}, key=len, reverse=True)
+            source = "|".join(re.escape(marker) for marker in wanted)
+            pattern = re.compile(source if kind is str else source.encode("utf-8"))
+            self._patterns[key] = pattern
+        return pattern
+
+    def scan(self, data: Any, chunk_size: int = CHUNK_SIZE) -> Set[str]:
+        """Names of the markers present in ``data``"""
+        remaining = set(self.markers)
+        tail: Union[str, bytes] = ""
+        for chunk in iter_chunks(data, chunk_size):
+            kind = str if isinstance(chunk, str) else bytes
+            if not isinstance(tail, kind):
+                tail = tail.encode("utf-8") if kind is bytes else tail.decode("utf-8", "ignore")
+            for offset in range(0, len(chunk), self.window_size):
+                if not remaining:
+                    return set(self.markers)
+                window = chunk[offset:offset + self.window_size]
+                if kind is bytes and not isinstance(window, bytes):
+                    window = bytes(window)
+                buffer = tail + window.lower()
+                position = 0
+                while remaining:
+                    match = self._pattern(kind, frozenset(remaining)).search(buffer, position)
+                    if match is None:
+                        break
+                    matched = match.group()
+                    if kind is bytes:
+                        matched = matched.decode("utf-8")
+                    remaining.difference_update(self._names_by_marker[matched])
+                    # Another marker may start at the same position
+                    position = match.start()
+                tail = buffer[max(0, len(buffer) - self._overlap):] if self._overlap else buffer[:0]
+        return set(self.markers) - remaining
@@ -0,0 +1,245 @@
+"""
+Ed25519 Ownership Signing Service
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Keyed signatures over ownership signatures and release artifacts
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Union
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+
+SIGNATURE_ALGORITHM = "Ed25519"
+DEFAULT_KEY_PATH = os.path.expanduser("~/.config/quantum-security/ownership_ed25519.pem")
+ARTIFACT_MESSAGE_PREFIX = b"ownership-artifact-sha256:"
+
+_key_cache: Dict[str, ed25519.Ed25519PrivateKey] = {}
+_key_lock = threading.Lock()
+
+
+def load_signing_key(path: Optional[str] = None, password: Optional[bytes] = None,
+                     create: bool = True) -> ed25519.Ed25519PrivateKey:
+    """Private key from a PEM file, loaded once per process and cached
+
+    The path defaults to ``OWNERSHIP_SIGNING_KEY`` or a file under
+    ``~/.config``.  A missing key is generated and written with mode 0600
+    when ``create`` is set.
+    """
+    path = os.path.abspath(path or os.environ.get("OWNERSHIP_SIGNING_KEY") or DEFAULT_KEY_PATH)
+    with _key_lock:
+        key = _key_cache.get(path)
+        if key is not None:
+            return key
+        if os.path.exists(path):
+            with open(path, "rb") as handle:
+                key = serialization.load_pem_private_key(handle.read(), password)
+            if not isinstance(key, ed25519.Ed25519PrivateKey):
+                raise ValueError(f"{path} does not hold an Ed25519 private key")
+        elif create:
+            key = ed25519.Ed25519PrivateKey.generate()
+            encryption = (serialization.BestAvailableEncryption(password) if password
+                          else serialization.NoEncryption())
+            pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, encryption)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(descriptor, "wb") as handle:
+                handle.write(pem)
+            logging.info(f"🔏 Generated Ed25519 ownership signing key at {path}")
+        else:
+            raise FileNotFoundError(f"No signing key at {path}")
+        _key_cache[path] = key
+        return key
+
+
+def public_key_bytes(public_key: ed25519.Ed25519PublicKey) -> bytes:
+    return public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+
+
+def key_id(public_key: ed25519.Ed25519PublicKey) -> str:
+    """Short identifier of a public key"""
+    return hashlib.sha256(public_key_bytes(public_key)).hexdigest()[:16]
+
+
+def artifact_message(path: str, buffer_size: int = 1024 * 1024) -> bytes:
+    """Domain-separated message for a file: its SHA-256 digest"""
+    digest = hashlib.sha256()
+    with open(path, "rb", buffering=0) as handle:
+        while True:
+            block = handle.read(buffer_size)
+            if not block:
+                break
+            digest.update(block)
+    return ARTIFACT_MESSAGE_PREFIX + digest.hexdigest().encode()
+
+
+def _slices(count: int, parts: int) -> List[range]:
+    """Split ``range(count)`` into contiguous slices, one task per slice instead of per item"""
+    size = max(1, -(-count // max(parts, 1)))
+    return [range(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+class OwnershipSigner:
+    """Batch Ed25519 signing and verification on a thread pool
+
+    The private key is loaded once per process (see
+    :func:`load_signing_key`).  Batches are split into one contiguous slice
+    per thread, so the pool overhead is paid per slice rather than per
+    signature.
+    """
+
+    def __init__(self, key_path: Optional[str] = None, password: Optional[bytes] = None,
+                 threads: Optional[int] = None,
+                 private_key: Optional[ed25519.Ed25519PrivateKey] = None):
+        self.owner = "Ervin Remus Radosavlevici"
+        self.contact = "radosavlevici210@icloud.com"
+        self.private_key = private_key or load_signing_key(key_path, password)
+        self.public_key = self.private_key.public_key()
+        self.key_id = key_id(self.public_key)
+        self.threads = threads or os.cpu_count() or 1
+
+    def sign(self, message: bytes) -> bytes:
+        return self.private_key.sign(message)
+
+    def sign_batch(self, messages: Sequence[bytes]) -> List[bytes]:
+        """Signatures of many messages, in order"""
+        signatures: List[bytes] = [b""] * len(messages)
+
+        def sign_slice(indices: range):
+            for index in indices:
+                signatures[index] = self.private_key.sign(messages[index])
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            list(executor.map(sign_slice, _slices(len(messages), self.threads)))
+        return signatures
+
+    def verify_batch(self, messages: Sequence[bytes], signatures: Sequence[bytes],
+                     public_key: Optional[ed25519.Ed25519PublicKey] = None) -> List[bool]:
+        """Whether each signature is valid for its message, in order"""
+        if len(messages) != len(signatures):
+            raise ValueError("Every message needs exactly one signature")
+        verifier = public_key or self.public_key
+        results: List[bool] = [False] * len(messages)
+
+        def verify_slice(indices: range):
+            for index in indices:
+                try:
+                    verifier.verify(signatures[index], messages[index])
+                    results[index] = True
+                except InvalidSignature:
+                    results[index] = False
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            list(executor.map(verify_slice, _slices(len(messages), self.threads)))
+        return results
+
+    def sign_artifacts(self, paths: Sequence[str]) -> List[Dict[str, Any]]:
+        """Sign the SHA-256 digest of every file"""
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            messages = list(executor.map(artifact_message, paths))
+        signatures = self.sign_batch(messages)
+        return [{
+            "path": path,
+            "sha256": message[len(ARTIFACT_MESSAGE_PREFIX):].decode(),
+            "algorithm": SIGNATURE_ALGORITHM,
+            "key_id": self.key_id,
+            "signature": base64.b64encode(signature).decode()
+        } for path, message, signature in zip(paths, messages, signatures)]
+
+    def verify_artifacts(self, records: Sequence[Dict[str, Any]]) -> List[bool]:
+        """Re-hash the files of :meth:`sign_artifacts` records and check their signatures"""
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            messages = list(executor.map(artifact_message, [record["path"] for record in records]))
+        return self.verify_batch(messages, [base64.b64decode(record["signature"]) for record in records])
+
+    @staticmethod
+    def ownership_message(signature: Dict[str, Any]) -> bytes:
+        """Canonical bytes of an ownership signature's signed data"""
+        return json.dumps(signature["signature_data"], sort_keys=True, separators=(",", ":")).encode()
+
+    def sign_ownership_signatures(self, signatures: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add an Ed25519 signature over ``signature_data`` to each ownership signature"""
+        sealed = self.sign_batch([self.ownership_message(signature) for signature in signatures])
+        public = base64.b64encode(public_key_bytes(self.public_key)).decode()
+        return [dict(signature, ed25519={
+            "algorithm": SIGNATURE_ALGORITHM,
+            "key_id": self.key_id,
+            "public_key": public,
+            "signature": base64.b64encode(seal).decode()
+        }) for signature, seal in zip(signatures, sealed)]
+
+    def verify_ownership_signatures(self, signatures: Sequence[Dict[str, Any]],
+                                    public_key: Optional[ed25519.Ed25519PublicKey] = None) -> List[bool]:
+        """Check the Ed25519 seals added by :meth:`sign_ownership_signatures`"""
+        messages, seals = [], []
+        for signature in signatures:
+            messages.append(self.ownership_message(signature))
+            seals.append(base64.b64decode(signature.get("ed25519", {}).get("signature", "")))
+        return self.verify_batch(messages, seals, public_key)
+
+
+def verify_signature(message: bytes, signature: bytes, public_key: Union[bytes, str]) -> bool:
+    """Check one signature against a raw (or base64) public key, without a private key"""
+    raw = base64.b64decode(public_key) if isinstance(public_key, str) else public_key
+    try:
+        ed25519.Ed25519PublicKey.from_public_bytes(raw).verify(signature, message)
+        return True
+    except InvalidSignature:
+        return False
+
+
+def benchmark_signing(messages: int = 5000, rsa_messages: int = 100, threads: Optional[int] = None,
+                      message_size: int = 256) -> Dict[str, Any]:
+    """Ed25519 batch signing and verification throughput against RSA-4096 (PSS, SHA-256)"""
+    payloads = [os.urandom(message_size) for _ in range(messages)]
+    signer = OwnershipSigner(threads=threads, private_key=ed25519.Ed25519PrivateKey.generate())
+
+    start = time.perf_counter()
+    signatures = signer.sign_batch(payloads)
+    ed25519_sign = messages / (time.perf_counter() - start)
+    start = time.perf_counter()
+    valid = signer.verify_batch(payloads, signatures)
+    ed25519_verify = messages / (time.perf_counter() - start)
+
+    rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=4096)
+    pss = padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH)
+    start = time.perf_counter()
+    rsa_signatures = [rsa_key.sign(payload, pss, hashes.SHA256()) for payload in payloads[:rsa_messages]]
+    rsa_sign = rsa_messages / (time.perf_counter() - start)
+    rsa_public = rsa_key.public_key()
+    start = time.perf_counter()
+    for payload, signature in zip(payloads, rsa_signatures):
+        rsa_public.verify(signature, payload, pss, hashes.SHA256())
+    rsa_verify = rsa_messages / (time.perf_counter() - start)
+
+    return {
+        "messages": messages,
+        "threads": signer.threads,
+        "all_valid": all(valid),
+        "ed25519_signatures_per_second": ed25519_sign,
+        "ed25519_verifications_per_second": ed25519_verify,
+        "rsa4096_signatures_per_second": rsa_sign,
+        "rsa4096_verifications_per_second": rsa_verify,
+        "signing_speedup_vs_rsa4096": ed25519_sign / rsa_sign,
+        "signature_bytes": {"ed25519": 64, "rsa4096": 512}
+    }
+
+
+if __name__ == "__main__":
+    report = benchmark_signing()
+    print("🔏 OWNERSHIP SIGNING BENCHMARK")
+    print(f"Ed25519: {report['ed25519_signatures_per_second']:.0f} signs/s, "
+          f"{report['ed25519_verifications_per_second']:.0f} verifies/s ({report['threads']} threads)")
+    print(f"RSA-4096: {report['rsa4096_signatures_per_second']:.0f} signs/s, "
+          f"{report['rsa4096_verifications_per_second']:.0f} verifies/s")
+    print(f"Signing speedup: {report['signing_speedup_vs_rsa4096']:.0f}x")
@@ -0,0 +1,291 @@
+"""
+Reproducible Release Bundles
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Byte-for-byte reproducible, signed ZIP bundles of deployment files
+
+A bundle is a ZIP archive whose bytes depend only on the files' paths,
+contents and executable bits and on the compression settings:
+
+* members are sorted by their POSIX path, with ``RELEASE-MANIFEST.json``
+  (path, size, mode and SHA-256 of every file) first;
+* every timestamp is 1980-01-01 00:00:00 and every mode is 0644 or 0755;
+  ZIP stores no owner, and no extra fields are written;
+* file data is split into fixed-size blocks that are deflated in parallel,
+  each primed with the previous 32 KiB as its dictionary and ended with a
+  sync flush, so the concatenated stream is an ordinary deflate stream
+  and the output does not depend on the number of threads.
+
+Anyone with the same files and the same zlib can rebuild the bundle and
+compare its SHA-256 with the signed one.  Files whose digest matches the
+previous build are copied from it raw instead of being compressed again.
+"""
+
+import os
+import json
+import stat
+import time
+import zlib
+import hashlib
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+from artifact_signing import file_digest
+from streaming_zip import StreamingZipWriter, ZIP64_LIMIT
+
+BUNDLE_FORMAT = "release-bundle-v1"
+MANIFEST_NAME = "RELEASE-MANIFEST.json"
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+BLOCK_SIZE = 1024 * 1024
+DICTIONARY_SIZE = 32 * 1024
+DEFAULT_EXCLUDES = (".git", "__pycache__", ".pytest_cache", "node_modules", ".venv", "venv")
+
+
+def _normalized_mode(mode: int) -> int:
+    return 0o755 if mode & 0o111 else 0o644
+
+
+def _member_info(name: str, mode: int, size: int) -> zipfile.ZipInfo:
+    """ZipInfo with every field that could vary between machines pinned"""
+    info = zipfile.ZipInfo(name, FIXED_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.create_system = 3
+    info.create_version = 20
+    info.extract_version = 20
+    info.external_attr = (stat.S_IFREG | mode) << 16
+    info.file_size = size
+    info.compress_size = 0
+    info.CRC = 0
+    info.header_offset = 0
+    return info
+
+
+def _deflate_block(job: Tuple[bytes, bytes, bool, int]) -> bytes:
+    """Raw deflate of one block, primed with the tail of the previous block"""
+    data, dictionary, last, level = job
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class ReleaseBundleBuilder:
+    """Build reproducible bundles, compressing blocks on a thread pool"""
+
+    def __init__(self, compresslevel: int = 6, threads: Optional[int] = None, block_size: int = BLOCK_SIZE,
+                 excludes: Sequence[str] = DEFAULT_EXCLUDES):
+        self.owner = "Ervin Remus Radosavlevici"
+        self.contact = "radosavlevici210@icloud.com"
+        self.compresslevel = compresslevel
+        self.threads = threads or os.cpu_count() or 1
+        self.block_size = block_size
+        self.excludes = set(excludes)
+
+    @property
+    def compression(self) -> Dict[str, Any]:
+        """Settings that, besides the files, determine the bundle's bytes"""
+        return {"method": "deflate", "level": self.compresslevel, "block_size": self.block_size,
+                "dictionary_size": DICTIONARY_SIZE, "zlib_version": zlib.ZLIB_VERSION}
+
+    def collect(self, paths: Sequence[str], root: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Sorted (member name, path) pairs; directories are walked recursively"""
+        root = os.path.abspath(root or os.getcwd())
+        found: Dict[str, str] = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                for directory, subdirectories, names in os.walk(path):
+                    subdirectories[:] = [name for name in subdirectories if name not in self.excludes]
+                    for name in names:
+                        candidate = os.path.join(directory, name)
+                        if name not in self.excludes and os.path.isfile(candidate):
+                            found[os.path.relpath(candidate, root)] = candidate
+            else:
+                found[os.path.relpath(path, root)] = path
+        pairs = []
+        for relative, path in found.items():
+            name = relative.replace(os.sep, "/")
+            if name.startswith("../") or name == MANIFEST_NAME:
+                raise ValueError(f"{path} cannot be bundled relative to {root}")
+            pairs.append((name, path))
+        return sorted(pairs)
+
+    def _blocks(self, path: str, crc: List[int]) -> Iterator[Tuple[bytes, bytes, bool, int]]:
+        """Deflate jobs for a file, read sequentially; the CRC is accumulated on the way"""
+        with open(path, "rb", buffering=0) as handle:
+            previous = b""
+            current = handle.read(self.block_size)
+            while True:
+                following = handle.read(self.block_size) if len(current) == self.block_size else b""
+                crc[0] = zlib.crc32(current, crc[0])
+                yield current, previous[-DICTIONARY_SIZE:], not following, self.compresslevel
+                if not following:
+                    return
+                previous, current = current, following
+
+    def _write_compressed(self, writer: StreamingZipWriter, executor: ThreadPoolExecutor,
+                          info: zipfile.ZipInfo, path: str):
+        """Stream one file into the archive, ``2 * threads`` blocks in memory at a time"""
+        member = writer.start_member(info, zip64=info.file_size >= ZIP64_LIMIT // 2)
+        crc = [0]
+        window: List[Tuple[bytes, bytes, bool, int]] = []
+        for job in self._blocks(path, crc):
+            window.append(job)
+            if len(window) >= self.threads * 2:
+                for payload in executor.map(_deflate_block, window):
+                    writer.fp.write(payload)
+                window = []
+        for payload in executor.map(_deflate_block, window):
+            writer.fp.write(payload)
+        member.CRC = crc[0] & 0xFFFFFFFF
+        writer.finish_member(member)
+
+    def _previous_members(self, previous: Optional[str]) -> Dict[str, str]:
+        """Member name -> SHA-256 from a previous bundle built with the same settings"""
+        if not previous or not os.path.exists(previous):
+            return {}
+        try:
+            with zipfile.ZipFile(previous) as archive:
+                manifest = json.loads(archive.read(MANIFEST_NAME))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as error:
+            logging.warning(f"📦 Ignoring previous bundle {previous}: {error}")
+            return {}
+        if manifest.get("format") != BUNDLE_FORMAT or manifest.get("compression") != self.compression:
+            return {}
+        return {entry["path"]: entry["sha256"] for entry in manifest["files"]}
+
+    def build(self, paths: Sequence[str], destination: str, root: Optional[str] = None,
+              previous: Optional[str] = None, signer=None) -> Dict[str, Any]:
+        """Write a bundle of ``paths`` (named relative to ``root``) to ``destination``
+
+        ``previous`` defaults to the existing bundle at ``destination``.
+        With an :class:`artifact_signing.ArtifactSigner` the bundle gets a
+        detached ``.sig`` next to it.
+        """
+        start = time.perf_counter()
+        pairs = self.collect(paths, root)
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            digests = list(executor.map(lambda pair: file_digest(pair[1]).hex(), pairs))
+        entries = []
+        for (name, path), digest in zip(pairs, digests):
+            status = os.stat(path)
+            entries.append({"path": name, "size": status.st_size,
+                            "mode": f"{_normalized_mode(status.st_mode):o}", "sha256": digest})
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "owner": self.owner,
+            "contact": self.contact,
+            "compression": self.compression,
+            "file_count": len(entries),
+            "total_bytes": sum(entry["size"] for entry in entries),
+            "files": entries
+        }
+        manifest_bytes = json.dumps(manifest, indent=1, sort_keys=True).encode() + b"\n"
+
+        previous = previous or destination
+        reusable = self._previous_members(previous)
+        reused, compressed = 0, 0
+        temp_path = f"{destination}.tmp-{os.getpid()}"
+        try:
+            with open(temp_path, "wb") as output, ThreadPoolExecutor(max_workers=self.threads) as executor:
+                writer = StreamingZipWriter(output, self.compresslevel)
+                writer.write_member(_member_info(MANIFEST_NAME, 0o644, len(manifest_bytes)), manifest_bytes)
+                old = open(previous, "rb") if reusable else None
+                try:
+                    old_infos = {}
+                    if old is not None:
+                        with zipfile.ZipFile(old) as archive:
+                            old_infos = {info.filename: info for info in archive.infolist()}
+                    for (name, path), entry in zip(pairs, entries):
+                        if reusable.get(name) == entry["sha256"] and name in old_infos:
+                            writer.copy_member(old, old_infos[name])
+                            reused += 1
+                        else:
+                            info = _member_info(name, int(entry["mode"], 8), entry["size"])
+                            self._write_compressed(writer, executor, info, path)
+                            compressed += 1
+                finally:
+                    if old is not None:
+                        old.close()
+                writer.close()
+                output.flush()
+                os.fsync(output.fileno())
+            os.replace(temp_path, destination)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        report = {
+            "status": "BUILT",
+            "bundle": destination,
+            "sha256": file_digest(destination).hex(),
+            "bundle_bytes": os.path.getsize(destination),
+            "file_count": len(entries),
+            "total_bytes": manifest["total_bytes"],
+            "files_compressed": compressed,
+            "files_reused": reused,
+            "elapsed_seconds": time.perf_counter() - start
+        }
+        if signer is not None:
+            report["signature"] = signer.sign_file(destination)
+            report["status"] = "SIGNED"
+        logging.info(f"📦 Bundle {destination}: {len(entries)} files, {compressed} compressed, {reused} reused")
+        return report
+
+
+def verify_release_bundle(path: str, public_key=None) -> Dict[str, Any]:
+    """Check every member against the manifest and, given a public key, the detached signature"""
+    mismatched = []
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read(MANIFEST_NAME))
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"{path} is not a release bundle")
+        names = {info.filename for info in archive.infolist()} - {MANIFEST_NAME}
+        listed = {entry["path"] for entry in manifest["files"]}
+        for entry in manifest["files"]:
+            if entry["path"] not in names:
+                mismatched.append(entry["path"])
+                continue
+            digest = hashlib.sha256()
+            with archive.open(entry["path"]) as member:
+                for block in iter(lambda: member.read(BLOCK_SIZE), b""):
+                    digest.update(block)
+            if digest.hexdigest() != entry["sha256"]:
+                mismatched.append(entry["path"])
+        unlisted = sorted(names - listed)
+
+    signature_valid = None
+    if public_key is not None:
+        from artifact_signing import ArtifactVerifier
+        signature_valid = ArtifactVerifier(public_key).verify_file(path)["status"] == "VALID"
+    intact = not mismatched and not unlisted
+    return {
+        "status": "VERIFIED" if intact and signature_valid is not False else "FAILED",
+        "files_checked": len(listed),
+        "mismatched": mismatched,
+        "unlisted": unlisted,
+        "signature_valid": signature_valid
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 4 or sys.argv[1] not in ("build", "verify"):
+        print("Usage: python release_bundle.py build <bundle.zip> <path>... | verify <bundle.zip> <public_key.pem>")
+        sys.exit(1)
+    if sys.argv[1] == "build":
+        from artifact_signing import ArtifactSigner
+        report = ReleaseBundleBuilder().build(sys.argv[3:], sys.argv[2], signer=ArtifactSigner())
+        print(f"📦 {report['status']} {report['bundle']} sha256={report['sha256']}")
+        print(f"{report['file_count']} files: {report['files_compressed']} compressed, "
+              f"{report['files_reused']} reused in {report['elapsed_seconds']:.2f}s")
+    else:
+        with open(sys.argv[3], "rb") as handle:
+            report = verify_release_bundle(sys.argv[2], handle.read())
+        print(f"📦 {report['status']}: {report['files_checked']} files, {len(report['mismatched'])} mismatched")
+        sys.exit(0 if report["status"] == "VERIFIED" else 1)
@@ -0,0 +1,410 @@
+"""
+Geometry-Robust Watermark Detection (Fourier-Mellin)
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Ownership marks that survive cropping, rescaling and rotation
+"""
+
+import os
+import math
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from invisible_watermarking import payload_from_signature, payload_to_code, _normal_cdf
+from copyright_protection import CopyrightProtection
+
+ImageInput = Union[str, np.ndarray]
+
+
+def _luma(pixels: np.ndarray) -> np.ndarray:
+    pixels = pixels.astype(np.float32)
+    if pixels.ndim == 3:
+        return pixels[..., 0] * 0.299 + pixels[..., 1] * 0.587 + pixels[..., 2] * 0.114
+    return pixels
+
+
+def _box_blur(values: np.ndarray, radius: int) -> np.ndarray:
+    """Separable mean filter over the last two axes using cumulative sums"""
+    width = 2 * radius + 1
+    for axis in (-2, -1):
+        padded = np.concatenate([np.take(values, [0] * radius, axis=axis), values,
+                                 np.take(values, [-1] * radius, axis=axis)], axis=axis)
+        cumulative = np.cumsum(padded, axis=axis, dtype=np.float32)
+        zero = np.zeros_like(np.take(cumulative, [0], axis=axis))
+        cumulative = np.concatenate([zero, cumulative], axis=axis)
+        length = values.shape[axis]
+        values = (np.take(cumulative, np.arange(width, width + length), axis=axis) -
+                  np.take(cumulative, np.arange(length), axis=axis)) / width
+    return values
+
+
+def _residual(luma: np.ndarray) -> np.ndarray:
+    """High-pass noise residual: the mark lives here, most image content does not"""
+    return luma - _box_blur(luma, 2)
+
+
+def _bilinear(image: np.ndarray, ys: np.ndarray, xs: np.ndarray) -> np.ndarray:
+    """Sample ``image`` (..., H, W) at fractional coordinates; outside samples are zero"""
+    height, width = image.shape[-2:]
+    y0, x0 = np.floor(ys).astype(np.int64), np.floor(xs).astype(np.int64)
+    fy, fx = (ys - y0).astype(np.float32), (xs - x0).astype(np.float32)
+    inside = (y0 >= 0) & (x0 >= 0) & (y0 < height - 1) & (x0 < width - 1)
+    y0, x0 = np.clip(y0, 0, height - 2), np.clip(x0, 0, width - 2)
+    flat = image.reshape(image.shape[:-2] + (-1,))
+    index = y0 * width + x0
+    top = flat[..., index] * (1 - fx) + flat[..., index + 1] * fx
+    bottom = flat[..., index + width] * (1 - fx) + flat[..., index + width + 1] * fx
+    return (top * (1 - fy) + bottom * fy) * inside
+
+
+def _peak_offset(surface: np.ndarray, row: int, column: int) -> Tuple[float, float]:
+    """Sub-sample peak position by parabolic interpolation on a circular surface"""
+    rows, columns = surface.shape
+
+    def vertex(minus: float, centre: float, plus: float) -> float:
+        denominator = minus - 2 * centre + plus
+        return 0.0 if denominator == 0 else 0.5 * (minus - plus) / denominator
+
+    dy = vertex(surface[(row - 1) % rows, column], surface[row, column], surface[(row + 1) % rows, column])
+    dx = vertex(surface[row, (column - 1) % columns], surface[row, column], surface[row, (column + 1) % columns])
+    return row + dy, column + dx
+
+
+class RobustWatermarker:
+    """Periodic keyed mark with Fourier-Mellin registration
+
+    The mark is a ``period`` x ``period`` tile of keyed +/-1 cells repeated
+    over the whole image: half of the energy is a payload-independent sync
+    pattern, half spreads the payload bits.  Because the mark is periodic,
+    its spectrum is a lattice of peaks whatever the payload.  Rotation and
+    scaling rotate and rescale that lattice, which the log-polar resampling
+    of the magnitude spectrum turns into a plain shift, found by phase
+    correlation against the reference lattice.  After undoing rotation and
+    scale, every visible tile is folded into one, the translation is found
+    by correlating with the sync pattern, and the payload is read from the
+    folded tile, so cropping only costs the tiles that were cut away.
+    """
+
+    def __init__(self, key: Optional[str] = None, strength: float = 3.0, period: int = 128,
+                 cell_size: int = 2, payload_bits: int = 64, window: int = 512,
+                 angle_samples: int = 720, radius_samples: int = 512, candidates: int = 3,
+                 min_scale: float = 0.25, max_scale: float = 4.0, detection_threshold: float = 0.999):
+        self.owner = "Ervin Remus Radosavlevici"
+        self.contact = "radosavlevici210@icloud.com"
+        self.orcid = "0009-0000-9787-510X"
+        self.key = key or f"{self.owner}|{self.contact}|{self.orcid}|robust"
+        self.strength = strength
+        self.period = period
+        self.cell_size = cell_size
+        self.payload_bits = payload_bits
+        self.window = window
+        self.angle_samples = angle_samples
+        self.radius_samples = radius_samples
+        self.candidates = candidates
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.detection_threshold = detection_threshold
+
+        cells = period // cell_size
+        seed = int.from_bytes(hashlib.sha256(self.key.encode()).digest()[:8], "big")
+        rng = np.random.default_rng(seed)
+        expand = np.ones((cell_size, cell_size), dtype=np.float32)
+        self._sync = np.kron(rng.choice([-1.0, 1.0], size=(cells, cells)), expand).astype(np.float32)
+        self._spreading = np.kron(rng.choice([-1.0, 1.0], size=(cells, cells)), expand).astype(np.float32)
+        cell_bits = np.empty(cells * cells, dtype=np.int64)
+        cell_bits[rng.permutation(cells * cells)] = np.arange(cells * cells) % payload_bits
+        self._assignment = np.kron(cell_bits.reshape(cells, cells), np.ones((cell_size, cell_size), dtype=np.int64))
+        self._sync_spectrum = np.conj(np.fft.fft2(self._sync))
+        # Unused keyed patterns give the null distribution of the per-bit sums
+        self._decoys = np.kron(rng.choice([-1.0, 1.0], size=(4, cells, cells)),
+                               expand[np.newaxis]).astype(np.float32)
+
+        self._radius_min = 6.0
+        self._radius_max = 0.45 * window
+        self._log_step = math.log(self._radius_max / self._radius_min) / (radius_samples - 1)
+        angles = np.arange(angle_samples) * (math.pi / angle_samples)
+        radii = self._radius_min * np.exp(np.arange(radius_samples) * self._log_step)
+        centre = window / 2
+        self._polar_y = centre + radii[np.newaxis, :] * np.sin(angles)[:, np.newaxis]
+        self._polar_x = centre + radii[np.newaxis, :] * np.cos(angles)[:, np.newaxis]
+        self._reference_spectrum = np.conj(np.fft.fft2(self._log_polar(self._lattice_magnitude()[np.newaxis]),
+                                                       s=(angle_samples, 2 * radius_samples)))
+
+    def _tile(self, payload: np.ndarray) -> np.ndarray:
+        signs = np.where(np.asarray(payload) > 0, 1.0, -1.0).astype(np.float32)
+        return (self._sync + self._spreading * signs[self._assignment]) / math.sqrt(2.0)
+
+    def embed(self, pixels: np.ndarray, payload: np.ndarray) -> np.ndarray:
+        """Add the tiled mark to a uint8 (H, W) or (H, W, C) image"""
+        if len(payload) != self.payload_bits:
+            raise ValueError(f"Payload must contain {self.payload_bits} bits")
+        height, width = pixels.shape[:2]
+        reps = (-(-height // self.period), -(-width // self.period))
+        mark = self.strength * np.tile(self._tile(payload), reps)[:height, :width]
+        marked = pixels.astype(np.float32)
+        if marked.ndim == 3:
+            marked[..., :3] += mark[..., np.newaxis]
+        else:
+            marked += mark
+        return np.clip(np.rint(marked), 0, 255).astype(np.uint8)
+
+    def _lattice_magnitude(self) -> np.ndarray:
+        """Reference spectrum: unit peaks on the lattice of the unscaled periodic mark"""
+        magnitude = np.zeros((self.window, self.window), dtype=np.float32)
+        spacing = self.window / self.period
+        steps = np.arange(-int(self.window / 2 / spacing), int(self.window / 2 / spacing) + 1)
+        coordinates = np.rint(self.window / 2 + steps * spacing).astype(int)
+        coordinates = coordinates[(coordinates >= 0) & (coordinates < self.window)]
+        magnitude[np.ix_(coordinates, coordinates)] = 1.0
+        return _box_blur(magnitude, 1)
+
+    def _log_polar(self, magnitudes: np.ndarray) -> np.ndarray:
+        """(B, N, N) centred magnitude spectra -> (B, angles, log-radii)"""
+        return _bilinear(magnitudes, self._polar_y, self._polar_x)
+
+    def _windowed_residuals(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """Centre crop of every image's residual, Hann-windowed and zero-padded to the window size"""
+        batch = np.zeros((len(images), self.window, self.window), dtype=np.float32)
+        for index, luma in enumerate(images):
+            height, width = min(luma.shape[0], self.window), min(luma.shape[1], self.window)
+            top, left = (luma.shape[0] - height) // 2, (luma.shape[1] - width) // 2
+            crop = _residual(luma[top:top + height, left:left + width])
+            hann = np.outer(np.hanning(height), np.hanning(width)).astype(np.float32)
+            batch[index, :height, :width] = crop * hann
+        return batch
+
+    def estimate_transforms(self, lumas: Sequence[np.ndarray]) -> List[List[Tuple[float, float, float]]]:
+        """Candidate (rotation degrees modulo 90, scale, score) per image, best first"""
+        spectra = np.abs(np.fft.fftshift(np.fft.fft2(self._windowed_residuals(lumas)), axes=(-2, -1)))
+        # Whiten so that isolated lattice peaks stand out from the smooth image spectrum
+        spectra = np.maximum(spectra / (_box_blur(spectra, 4) + 1e-6) - 1.0, 0.0)
+        polar = self._log_polar(spectra)
+        polar -= polar.mean(axis=(-2, -1), keepdims=True)
+        cross = np.fft.fft2(polar, s=(self.angle_samples, 2 * self.radius_samples)) * self._reference_spectrum
+        cross /= np.abs(cross) + 1e-9
+        surfaces = np.real(np.fft.ifft2(cross))
+
+        results = []
+        for surface in surfaces:
+            # Angles repeat every 90 degrees for a square lattice; fold before picking peaks
+            quarter = self.angle_samples // 2
+            folded = surface[:quarter] + surface[quarter:2 * quarter]
+            candidates = []
+            working = folded.copy()
+            for _ in range(self.candidates):
+                row, column = np.unravel_index(np.argmax(working), working.shape)
+                score = float(working[row, column])
+                angle_index, radius_index = _peak_offset(folded, row, column)
+                if radius_index > self.radius_samples:
+                    radius_index -= 2 * self.radius_samples
+                rotation = angle_index * 180.0 / self.angle_samples
+                scale = math.exp(-radius_index * self._log_step)
+                candidates.append((rotation % 90.0, scale, score))
+                rows = np.arange(row - 4, row + 5) % working.shape[0]
+                columns = np.arange(column - 4, column + 5) % working.shape[1]
+                working[np.ix_(rows, columns)] = -np.inf
+            results.append(candidates)
+        return results
+
+    def _fold(self, luma: np.ndarray, rotation: float, scale: float) -> np.ndarray:
+        """Resample the image into the mark's frame and sum all whole tiles into one"""
+        height, width = luma.shape
+        tiles = max(1, int(min(height, width) / (scale * math.sqrt(2.0)) // self.period))
+        size = tiles * self.period
+        coordinates = np.arange(size, dtype=np.float32) - size / 2
+        v, u = np.meshgrid(coordinates, coordinates, indexing="ij")
+        theta = math.radians(rotation)
+        cos, sin = math.cos(theta), math.sin(theta)
+        xs = width / 2 + scale * (cos * u - sin * v)
+        ys = height / 2 + scale * (sin * u + cos * v)
+        canonical = _residual(_bilinear(luma, ys, xs))
+        return canonical.reshape(tiles, self.period, tiles, self.period).sum(axis=(0, 2))
+
+    @staticmethod
+    def _lattice_aliases(rotation: float, scale: float) -> List[Tuple[float, float]]:
+        """Transforms whose lattice overlaps the detected one: a square lattice is
+        self-similar under doubling and under a 45 degree turn with a sqrt(2) scale"""
+        return [(rotation, scale * 2.0), (rotation, scale / 2.0),
+                ((rotation + 45.0) % 90.0, scale * math.sqrt(2.0)),
+                ((rotation + 45.0) % 90.0, scale / math.sqrt(2.0))]
+
+    def _register(self, folded: np.ndarray) -> Tuple[float, int, Tuple[int, int], np.ndarray]:
+        """Best quarter-turn and translation of a folded tile against the sync pattern"""
+        best = None
+        for quarter_turns in range(4):
+            rotated = np.rot90(folded, quarter_turns)
+            surface = np.real(np.fft.ifft2(np.fft.fft2(rotated) * self._sync_spectrum))
+            row, column = np.unravel_index(np.argmax(surface), surface.shape)
+            score = float((surface[row, column] - surface.mean()) / (surface.std() + 1e-9))
+            if best is None or score > best[0]:
+                aligned = np.roll(rotated, (-row, -column), axis=(0, 1))
+                best = (score, quarter_turns, (int(row), int(column)), aligned)
+        return best
+
+    def _sync_confidence(self, sync_score: float, trials: int) -> float:
+        """Probability that the sync peak is not the best of ``trials`` chance alignments"""
+        positions = 4 * self.period * self.period * trials
+        return max(0.0, 1.0 - positions * (1.0 - _normal_cdf(sync_score)))
+
+    def _confidence(self, sums: np.ndarray, deviation: float,
+                    expected_payload: Optional[np.ndarray]) -> Tuple[float, float]:
+        """Combined z-score and confidence, informed or blind as for the DCT mark"""
+        if expected_payload is not None:
+            expected_signs = np.where(np.asarray(expected_payload) > 0, 1.0, -1.0)
+            z_total = float(np.sum(expected_signs * sums) / (deviation * math.sqrt(self.payload_bits)))
+        else:
+            k = float(self.payload_bits)
+            statistic = float(np.sum((sums / deviation) ** 2)) / k
+            z_total = (statistic ** (1.0 / 3.0) - (1.0 - 2.0 / (9.0 * k))) / math.sqrt(2.0 / (9.0 * k))
+        return z_total, _normal_cdf(z_total)
+
+    def detect_batch(self, images: Sequence[ImageInput],
+                     expected_payload: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Register and decode a batch of images; spectra for the whole batch are computed together"""
+        lumas = [_luma(_load_pixels(image)) for image in images]
+        estimates = self.estimate_transforms(lumas)
+        results = []
+        assignment = self._assignment.ravel()
+        for luma, candidates in zip(lumas, estimates):
+            transforms = [(rotation, scale) for rotation, scale, _ in candidates]
+            transforms += self._lattice_aliases(*transforms[0])
+            best, trials = None, 0
+            for rotation, scale in transforms:
+                if not self.min_scale <= scale <= self.max_scale:
+                    continue
+                trials += 1
+                sync_score, quarter_turns, shift, aligned = self._register(self._fold(luma, rotation, scale))
+                if best is None or sync_score > best[0]:
+                    best = (sync_score, rotation + 90.0 * quarter_turns, scale, shift, aligned)
+                if self._sync_confidence(sync_score, len(transforms)) >= self.detection_threshold:
+                    break
+            sync_score, rotation, scale, shift, aligned = best
+
+            sums = np.bincount(assignment, weights=(aligned * self._spreading).ravel(),
+                               minlength=self.payload_bits)
+            null_sums = np.stack([np.bincount(assignment, weights=(aligned * decoy).ravel(),
+                                              minlength=self.payload_bits) for decoy in self._decoys])
+            deviation = float(np.sqrt(np.mean(null_sums ** 2))) + 1e-12
+            z_total, confidence = self._confidence(sums, deviation, expected_payload)
+            sync_confidence = self._sync_confidence(sync_score, len(transforms))
+            bits = (sums > 0).astype(np.uint8)
+            result = {
+                "payload": bits,
+                "verification_code": payload_to_code(bits),
+                "transform": {
+                    "rotation_degrees": float((-rotation) % 360.0),
+                    "scale": float(scale),
+                    "translation": (float(shift[1] * scale), float(shift[0] * scale))
+                },
+                "sync_score": sync_score,
+                "sync_confidence": sync_confidence,
+                "candidates_tried": trials,
+                "z_score": z_total,
+                "confidence": confidence,
+                "detected": min(confidence, sync_confidence) >= self.detection_threshold
+            }
+            if expected_payload is not None:
+                result["bit_error_rate"] = float(np.mean(bits != np.asarray(expected_payload)))
+            results.append(result)
+        return results
+
+    def detect(self, image: ImageInput, expected_payload: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Register and decode one image"""
+        return self.detect_batch([image], expected_payload)[0]
+
+
+def _load_pixels(image: ImageInput) -> np.ndarray:
+    if isinstance(image, str):
+        with Image.open(image) as opened:
+            return np.asarray(opened.convert("RGB"))
+    return np.asarray(image)
+
+
+_worker_detector: Optional[RobustWatermarker] = None
+
+
+def _init_detector_worker(options: Dict[str, Any]):
+    """Build the reference spectra once per worker process"""
+    global _worker_detector
+    _worker_detector = RobustWatermarker(**options)
+
+
+def _detect_worker(job: Tuple[List[ImageInput], Optional[np.ndarray]]) -> List[Dict[str, Any]]:
+    images, expected_payload = job
+    return _worker_detector.detect_batch(images, expected_payload)
+
+
+def detect_images_parallel(images: Sequence[ImageInput], expected_payload: Optional[np.ndarray] = None,
+                           workers: Optional[int] = None, batch_size: int = 8,
+                           **options) -> List[Dict[str, Any]]:
+    """Detect marks in many images, one batch per task across a process pool"""
+    jobs = [(list(images[offset:offset + batch_size]), expected_payload)
+            for offset in range(0, len(images), batch_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_detector_worker,
+                             initargs=(options,)) as executor:
+        return [result for batch in executor.map(_detect_worker, jobs) for result in batch]
+
+
+def embed_robust_ownership_watermark(pixels: np.ndarray, data: Any,
+                                     watermarker: Optional[RobustWatermarker] = None
+                                     ) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Embed a geometry-robust mark carrying the ownership signature of ``data``"""
+    watermarker = watermarker or RobustWatermarker()
+    signature = CopyrightProtection().create_ownership_signature(data)
+    return watermarker.embed(pixels, payload_from_signature(signature)), signature
+
+
+def detect_robust_ownership_watermark(image: ImageInput, signature: Optional[Dict[str, Any]] = None,
+                                      watermarker: Optional[RobustWatermarker] = None) -> Dict[str, Any]:
+    """Detect a geometry-robust ownership mark, optionally against a known signature"""
+    watermarker = watermarker or RobustWatermarker()
+    expected = payload_from_signature(signature) if signature is not None else None
+    return watermarker.detect(image, expected)
+
+
+def benchmark_robust_detection(width: int = 1600, height: int = 1200, images: int = 8,
+                               batch_size: int = 4) -> Dict[str, Any]:
+    """Detection latency per image on rescaled, rotated and cropped copies"""
+    watermarker = RobustWatermarker()
+    rng = np.random.default_rng(2025)
+    base = _box_blur(rng.normal(128, 60, size=(height, width)).astype(np.float32), 6)
+    base = np.clip(base + np.linspace(-40, 40, width)[np.newaxis, :], 0, 255).astype(np.uint8)
+    payload = rng.integers(0, 2, size=watermarker.payload_bits, dtype=np.uint8)
+    marked = Image.fromarray(watermarker.embed(base, payload))
+
+    attacked = []
+    for index in range(images):
+        scale = 0.6 + 0.8 * index / max(images - 1, 1)
+        angle = -15.0 + 30.0 * index / max(images - 1, 1)
+        transformed = marked.rotate(angle, resample=Image.BICUBIC).resize(
+            (int(width * scale), int(height * scale)), Image.BICUBIC)
+        crop = transformed.crop((transformed.width // 8, transformed.height // 8,
+                                 transformed.width * 7 // 8, transformed.height * 7 // 8))
+        attacked.append(np.asarray(crop))
+
+    watermarker.detect_batch(attacked[:1], payload)
+    start = time.perf_counter()
+    results = []
+    for offset in range(0, len(attacked), batch_size):
+        results.extend(watermarker.detect_batch(attacked[offset:offset + batch_size], payload))
+    elapsed = time.perf_counter() - start
+    return {
+        "images": len(attacked),
+        "latency_ms_per_image": elapsed / len(attacked) * 1000,
+        "detected": sum(result["detected"] for result in results),
+        "mean_bit_error_rate": float(np.mean([result["bit_error_rate"] for result in results])),
+        "transforms": [result["transform"] for result in results]
+    }
+
+
+if __name__ == "__main__":
+    report = benchmark_robust_detection()
+    print("🌀 ROBUST WATERMARK DETECTION BENCHMARK")
+    print(f"Latency: {report['latency_ms_per_image']:.1f} ms/image over {report['images']} attacked images")
+    print(f"Detected: {report['detected']}/{report['images']} | mean BER {report['mean_bit_error_rate']:.3f}")
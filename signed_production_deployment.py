@@ -15,12 +15,14 @@ import hashlib
 import logging
 import hmac
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives.serialization import load_pem_private_key
 import base64
 
+from watermark_header import build_fixed_header, prepend_header_to_file, rekey_watermarked_files
+
 class SignedProductionDeployment:
     """Cryptographically signed production deployment system"""
     
@@ -79,6 +81,14 @@ class SignedProductionDeployment:
             }
         }
         
+    def _component_size(self, name: str, recorded: str) -> str:
+        """Size of a deployed component on disk, or the recorded value if it is not present"""
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+        try:
+            return f"{os.path.getsize(path):,} bytes"
+        except OSError:
+            return recorded
+        
     def generate_production_manifest(self) -> Dict[str, Any]:
         """Generate complete production deployment manifest"""
         return {
@@ -97,43 +107,43 @@ class SignedProductionDeployment:
             },
             "production_components": {
                 "production_neural_app.py": {
-                    "size": "9,132 bytes",
+                    "size": self._component_size("production_neural_app.py", "9,132 bytes"),
                     "description": "Neural AI processing engine",
                     "status": "DEPLOYED",
                     "signature": f"NEURAL-{self.signature[:16]}"
                 },
                 "vulnerability_fixes.py": {
-                    "size": "10,042 bytes", 
+                    "size": self._component_size("vulnerability_fixes.py", "10,042 bytes"), 
                     "description": "Complete security patch system",
                     "status": "DEPLOYED",
                     "signature": f"VULN-{self.signature[:16]}"
                 },
                 "theft_protection_block.py": {
-                    "size": "3,112 bytes",
+                    "size": self._component_size("theft_protection_block.py", "3,112 bytes"),
                     "description": "Advanced theft protection system",
                     "status": "DEPLOYED", 
                     "signature": f"THEFT-{self.signature[:16]}"
                 },
                 "complete_development_data_protection.py": {
-                    "size": "5,391 bytes",
+                    "size": self._component_size("complete_development_data_protection.py", "5,391 bytes"),
                     "description": "Comprehensive IP protection suite",
                     "status": "DEPLOYED",
                     "signature": f"DATA-{self.signature[:16]}"
                 },
                 "enhanced_production_system.py": {
-                    "size": "11,704 bytes",
+                    "size": self._component_size("enhanced_production_system.py", "11,704 bytes"),
                     "description": "Enhanced v2.0 production system",
                     "status": "DEPLOYED",
                     "signature": f"ENHANCED-{self.signature[:16]}"
                 },
                 "complete_secured_system.py": {
-                    "size": "11,136 bytes",
+                    "size": self._component_size("complete_secured_system.py", "11,136 bytes"),
                     "description": "Complete v3.0 secured system", 
                     "status": "DEPLOYED",
                     "signature": f"SECURED-{self.signature[:16]}"
                 },
                 "signed_production_deployment.py": {
-                    "size": "CALCULATING",
+                    "size": self._component_size("signed_production_deployment.py", "CALCULATING"),
                     "description": "Signed v4.0 deployment system",
                     "status": "DEPLOYING",
                     "signature": f"SIGNED-{self.signature[:16]}"
@@ -195,9 +205,25 @@ class SignedProductionDeployment:
             }
         }
         
-    def generate_watermarked_content(self, content: str) -> str:
-        """Add watermark to content"""
-        watermark_header = f"""
+    def watermark_fields(self) -> Dict[str, str]:
+        """Values carried by the watermark header"""
+        return {
+            "watermark": self.watermark,
+            "copyright": f"© 2025 {self.owner}",
+            "contact": self.contact,
+            "orcid": self.orcid,
+            "signature": self.signature,
+            "timestamp": self.timestamp,
+            "deployment_key": self.deployment_key
+        }
+        
+    def watermark_header(self, layout: str = "fixed") -> bytes:
+        """Watermark header bytes for the given layout"""
+        if layout == "fixed":
+            return build_fixed_header(self.watermark_fields())
+        if layout != "legacy":
+            raise ValueError(f"Unknown watermark layout: {layout}")
+        return f"""
 # DIGITAL WATERMARK: {self.watermark}
 # COPYRIGHT: © 2025 {self.owner}
 # CONTACT: {self.contact}
@@ -208,8 +234,53 @@ class SignedProductionDeployment:
 # VERIFICATION: AUTHENTIC PRODUCTION CODE
 # ALL RIGHTS RESERVED
 
-"""
-        return watermark_header + content
+""".encode("utf-8")
+        
+    def generate_watermarked_content(self, content: str, layout: str = "fixed") -> str:
+        """Add watermark to content
+        
+        The default fixed-width header can later be re-keyed in place with
+        rekey_watermarked_files; layout="legacy" keeps the original
+        variable-length header.  For files use generate_watermarked_file,
+        which never holds the content in memory.
+        """
+        return self.watermark_header(layout).decode("utf-8") + content
+        
+    def generate_watermarked_file(self, source_path: str, destination_path: Optional[str] = None,
+                                  layout: str = "fixed") -> Dict[str, Any]:
+        """Watermark a file on disk, copying its body kernel-side and renaming atomically"""
+        return prepend_header_to_file(source_path, self.watermark_header(layout), destination_path)
+        
+    def rekey_watermarked_files(self, paths: List[str], workers: Optional[int] = None,
+                                group_size: int = 64) -> Dict[str, Any]:
+        """Stamp this deployment's key and signature into already watermarked files"""
+        return rekey_watermarked_files(paths, self.watermark_fields(), workers, group_size)
+        
+    def sign_artifacts(self, paths: List[str], key_path: Optional[str] = None,
+                       threads: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Ed25519-sign the SHA-256 digest of every deployment artifact"""
+        from ownership_signing import OwnershipSigner
+        return OwnershipSigner(key_path, threads=threads).sign_artifacts(paths)
+        
+    def sign_release_artifacts(self, paths: List[str], key_path: Optional[str] = None,
+                               threads: Optional[int] = None) -> List[Dict[str, Any]]:
+        """SHA256-RSA-4096 (PSS) detached signatures, written next to each artifact as .sig"""
+        from artifact_signing import ArtifactSigner
+        return ArtifactSigner(key_path, threads=threads).sign_artifacts(paths)
+
+    def verify_release_artifacts(self, paths: List[str], public_key_pem: Union[bytes, str],
+                                 threads: Optional[int] = None) -> Dict[str, Any]:
+        """Check the .sig files of sign_release_artifacts against a trusted public key"""
+        from artifact_signing import ArtifactVerifier
+        return ArtifactVerifier(public_key_pem, threads).verify_artifacts(paths)
+        
+    def build_release_bundle(self, paths: List[str], destination: str, root: Optional[str] = None,
+                             key_path: Optional[str] = None, threads: Optional[int] = None) -> Dict[str, Any]:
+        """Reproducible ZIP bundle of the deployment files, RSA-signed with a detached .sig"""
+        from artifact_signing import ArtifactSigner
+        from release_bundle import ReleaseBundleBuilder
+        return ReleaseBundleBuilder(threads=threads).build(paths, destination, root,
+                                                           signer=ArtifactSigner(key_path, threads=threads))
         
     def create_production_readme(self) -> str:
         """Create comprehensive production README"""
@@ -304,6 +375,47 @@ def generate_production_readme():
     deployment = SignedProductionDeployment()
     return deployment.create_production_readme()
 
+def benchmark_watermarked_file(size: int = 512 * 1024 * 1024) -> Dict[str, Any]:
+    """Throughput and peak RSS growth of file watermarking against the in-memory string version"""
+    import time
+    import resource
+    import tempfile
+
+    deployment = SignedProductionDeployment()
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.py")
+        line = b"print('quantum security production payload')  # " + b"x" * 77 + b"\n"
+        block = line * (1024 * 1024 // len(line))
+        with open(source, "wb") as handle:
+            for _ in range(0, size, len(block)):
+                handle.write(block)
+        size = os.path.getsize(source)
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        report = deployment.generate_watermarked_file(source, os.path.join(directory, "file.py"))
+        file_seconds = time.perf_counter() - start
+        file_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        with open(source, encoding="utf-8") as handle:
+            watermarked = deployment.generate_watermarked_content(handle.read())
+        with open(os.path.join(directory, "string.py"), "w", encoding="utf-8") as handle:
+            handle.write(watermarked)
+        string_seconds = time.perf_counter() - start
+        string_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+        del watermarked
+
+    return {
+        "bytes": size,
+        "copy_methods": report["copy_methods"],
+        "file_mb_per_second": size / file_seconds / 1e6,
+        "string_mb_per_second": size / string_seconds / 1e6,
+        "file_peak_rss_growth_kb": file_rss,
+        "string_peak_rss_growth_kb": string_rss
+    }
+
 if __name__ == "__main__":
     manifest = deploy_signed_production_system()
     print("✅ SIGNED PRODUCTION SYSTEM DEPLOYED")
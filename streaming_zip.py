@@ -0,0 +1,296 @@
+"""
+Streaming ZIP Archive Rewriter
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Raw member copying for fast copyright injection into ZIP containers
+"""
+
+import os
+import zlib
+import struct
+import zipfile
+import binascii
+from typing import Callable, Dict, Any, List, Optional, BinaryIO
+
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+DATA_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+ZIP64_EXTRA_ID = 0x0001
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def _dos_datetime(date_time: tuple) -> tuple:
+    """Convert a ZipInfo date_time tuple to DOS (time, date) fields"""
+    year, month, day, hour, minute, second = date_time
+    dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | second // 2
+    return dos_time, dos_date
+
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """Remove the ZIP64 extended-information field; it is regenerated on write"""
+    kept = bytearray()
+    position = 0
+    while position + 4 <= len(extra):
+        field_id, size = struct.unpack("<HH", extra[position:position + 4])
+        if field_id != ZIP64_EXTRA_ID:
+            kept += extra[position:position + 4 + size]
+        position += 4 + size
+    return bytes(kept)
+
+
+def _encoded_name(info: zipfile.ZipInfo) -> bytes:
+    """Encode a member name the way its general-purpose flags declare"""
+    if info.flag_bits & 0x800:
+        return info.filename.encode("utf-8")
+    try:
+        return info.filename.encode("cp437")
+    except UnicodeEncodeError:
+        info.flag_bits |= 0x800
+        return info.filename.encode("utf-8")
+
+
+def _copy_bytes(source: BinaryIO, destination: BinaryIO, length: int):
+    """Copy exactly ``length`` bytes between file objects with a reused buffer"""
+    buffer = bytearray(min(COPY_BUFFER_SIZE, max(length, 1)))
+    view = memoryview(buffer)
+    remaining = length
+    while remaining:
+        read = source.readinto(view[:min(remaining, len(buffer))])
+        if not read:
+            raise zipfile.BadZipFile("Unexpected end of archive while copying member data")
+        destination.write(view[:read])
+        remaining -= read
+
+
+class StreamingZipWriter:
+    """ZIP writer that can append members as raw, already-compressed bytes
+
+    Members copied with :meth:`copy_member` keep their original local
+    header, compressed data and data descriptor byte for byte; only their
+    offset in the rebuilt central directory changes.
+    """
+
+    def __init__(self, fp: BinaryIO, compresslevel: int = 6):
+        self.fp = fp
+        self.compresslevel = compresslevel
+        self.entries: List[zipfile.ZipInfo] = []
+        self._open_member: Optional[tuple] = None
+
+    def copy_member(self, source: BinaryIO, info: zipfile.ZipInfo):
+        """Copy a member's local header, data and descriptor verbatim"""
+        source.seek(info.header_offset)
+        header = source.read(30)
+        if header[:4] != LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        local_extra_offset = info.header_offset + 30 + name_length
+        source.seek(local_extra_offset)
+        local_extra = source.read(extra_length)
+
+        length = 30 + name_length + extra_length + info.compress_size
+        if info.flag_bits & 0x08:
+            source.seek(info.header_offset + length)
+            zip64 = _has_zip64_extra(local_extra) or info.compress_size >= ZIP64_LIMIT or \
+                info.file_size >= ZIP64_LIMIT
+            signature = source.read(4)
+            length += (4 if signature == DATA_DESCRIPTOR_SIGNATURE else 0) + (20 if zip64 else 12)
+
+        copied = _clone_info(info)
+        copied.header_offset = self.fp.tell()
+        source.seek(info.header_offset)
+        _copy_bytes(source, self.fp, length)
+        self.entries.append(copied)
+
+    def write_member(self, info: zipfile.ZipInfo, data: bytes):
+        """Compress and append a member built from ``info`` and new content"""
+        member = _clone_info(info)
+        member.flag_bits &= ~0x08
+        member.file_size = len(data)
+        member.CRC = binascii.crc32(data) & 0xFFFFFFFF
+        if member.compress_type == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+            payload = compressor.compress(data) + compressor.flush()
+        elif member.compress_type == zipfile.ZIP_STORED:
+            payload = data
+        else:
+            member.compress_type = zipfile.ZIP_DEFLATED
+            compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+            payload = compressor.compress(data) + compressor.flush()
+        member.compress_size = len(payload)
+        member.header_offset = self.fp.tell()
+
+        name = _encoded_name(member)
+        extra = _strip_zip64_extra(member.extra)
+        zip64 = member.file_size >= ZIP64_LIMIT or member.compress_size >= ZIP64_LIMIT
+        if zip64:
+            extra = struct.pack("<HHQQ", ZIP64_EXTRA_ID, 16, member.file_size, member.compress_size) + extra
+        dos_time, dos_date = _dos_datetime(member.date_time)
+        extract_version = max(member.extract_version, 45 if zip64 else 20)
+        self.fp.write(struct.pack(
+            "<4sHHHHHIIIHH", LOCAL_HEADER_SIGNATURE, extract_version, member.flag_bits,
+            member.compress_type, dos_time, dos_date, member.CRC,
+            ZIP64_LIMIT if zip64 else member.compress_size,
+            ZIP64_LIMIT if zip64 else member.file_size, len(name), len(extra)))
+        self.fp.write(name)
+        self.fp.write(extra)
+        self.fp.write(payload)
+        self.entries.append(member)
+
+    def start_member(self, info: zipfile.ZipInfo, zip64: bool = False) -> zipfile.ZipInfo:
+        """Write a local header whose CRC and sizes are patched by :meth:`finish_member`
+
+        The caller writes the compressed data to ``fp`` in between, so a
+        member can be streamed without knowing its CRC or compressed size
+        up front and without a data descriptor.  ``zip64`` reserves room
+        for 64-bit sizes and must be set if either size may reach 4 GiB.
+        """
+        member = _clone_info(info)
+        member.flag_bits &= ~0x08
+        member.header_offset = self.fp.tell()
+        name = _encoded_name(member)
+        extra = _strip_zip64_extra(member.extra)
+        if zip64:
+            extra = struct.pack("<HHQQ", ZIP64_EXTRA_ID, 16, 0, 0) + extra
+        member.extract_version = max(member.extract_version, 45 if zip64 else 20)
+        dos_time, dos_date = _dos_datetime(member.date_time)
+        self.fp.write(struct.pack(
+            "<4sHHHHHIIIHH", LOCAL_HEADER_SIGNATURE, member.extract_version, member.flag_bits,
+            member.compress_type, dos_time, dos_date, 0,
+            ZIP64_LIMIT if zip64 else 0, ZIP64_LIMIT if zip64 else 0, len(name), len(extra)))
+        self.fp.write(name)
+        zip64_offset = self.fp.tell() + 4 if zip64 else None
+        self.fp.write(extra)
+        self._open_member = (member, self.fp.tell(), zip64_offset)
+        return member
+
+    def finish_member(self, member: zipfile.ZipInfo):
+        """Patch the local header of :meth:`start_member` once CRC and sizes are known"""
+        opened, data_offset, zip64_offset = self._open_member
+        if opened is not member:
+            raise ValueError(f"{member.filename} is not the member being written")
+        self._open_member = None
+        end = self.fp.tell()
+        member.compress_size = end - data_offset
+        if zip64_offset is not None:
+            self.fp.seek(member.header_offset + 14)
+            self.fp.write(struct.pack("<I", member.CRC))
+            self.fp.seek(zip64_offset)
+            self.fp.write(struct.pack("<QQ", member.file_size, member.compress_size))
+        else:
+            if member.file_size >= ZIP64_LIMIT or member.compress_size >= ZIP64_LIMIT:
+                raise zipfile.LargeZipFile(f"{member.filename} needs ZIP64 sizes; start it with zip64=True")
+            self.fp.seek(member.header_offset + 14)
+            self.fp.write(struct.pack("<III", member.CRC, member.compress_size, member.file_size))
+        self.fp.seek(end)
+        self.entries.append(member)
+
+    def close(self):
+        """Write the central directory and end-of-central-directory records"""
+        directory_offset = self.fp.tell()
+        for info in self.entries:
+            name = _encoded_name(info)
+            extra = _strip_zip64_extra(info.extra)
+            zip64_values = []
+            file_size, compress_size, header_offset = info.file_size, info.compress_size, info.header_offset
+            if file_size >= ZIP64_LIMIT:
+                zip64_values.append(file_size)
+                file_size = ZIP64_LIMIT
+            if compress_size >= ZIP64_LIMIT:
+                zip64_values.append(compress_size)
+                compress_size = ZIP64_LIMIT
+            if header_offset >= ZIP64_LIMIT:
+                zip64_values.append(header_offset)
+                header_offset = ZIP64_LIMIT
+            if zip64_values:
+                extra = struct.pack(f"<HH{len(zip64_values)}Q", ZIP64_EXTRA_ID,
+                                    8 * len(zip64_values), *zip64_values) + extra
+            extract_version = max(info.extract_version, 45 if zip64_values else 20)
+            create_version = max(info.create_version, extract_version)
+            dos_time, dos_date = _dos_datetime(info.date_time)
+            comment = info.comment or b""
+            self.fp.write(struct.pack(
+                "<4sBBHHHHHIIIHHHHHII", b"PK\x01\x02", create_version, info.create_system,
+                extract_version, info.flag_bits, info.compress_type, dos_time, dos_date,
+                info.CRC, compress_size, file_size, len(name), len(extra), len(comment),
+                0, info.internal_attr, info.external_attr, header_offset))
+            self.fp.write(name)
+            self.fp.write(extra)
+            self.fp.write(comment)
+
+        directory_end = self.fp.tell()
+        directory_size = directory_end - directory_offset
+        count = len(self.entries)
+        if count >= ZIP64_COUNT_LIMIT or directory_offset >= ZIP64_LIMIT or directory_size >= ZIP64_LIMIT:
+            self.fp.write(struct.pack("<4sQHHIIQQQQ", b"PK\x06\x06", 44, 45, 45, 0, 0,
+                                      count, count, directory_size, directory_offset))
+            self.fp.write(struct.pack("<4sIQI", b"PK\x06\x07", 0, directory_end, 1))
+            count = min(count, ZIP64_COUNT_LIMIT)
+            directory_size = min(directory_size, ZIP64_LIMIT)
+            directory_offset = min(directory_offset, ZIP64_LIMIT)
+        self.fp.write(struct.pack("<4sHHHHIIH", b"PK\x05\x06", 0, 0, count, count,
+                                  directory_size, directory_offset, 0))
+
+
+def _has_zip64_extra(extra: bytes) -> bool:
+    """Whether an extra field block contains a ZIP64 record"""
+    position = 0
+    while position + 4 <= len(extra):
+        field_id, size = struct.unpack("<HH", extra[position:position + 4])
+        if field_id == ZIP64_EXTRA_ID:
+            return True
+        position += 4 + size
+    return False
+
+
+def _clone_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    """Copy the ZipInfo fields needed to rebuild a central directory record"""
+    clone = zipfile.ZipInfo(info.filename, info.date_time)
+    for field in ("compress_type", "comment", "extra", "create_system", "create_version",
+                  "extract_version", "flag_bits", "volume", "internal_attr", "external_attr",
+                  "header_offset", "CRC", "compress_size", "file_size"):
+        setattr(clone, field, getattr(info, field))
+    return clone
+
+
+def rewrite_zip(source: str, destination: str,
+                transforms: Dict[str, Callable[[bytes], Optional[bytes]]],
+                compresslevel: int = 6) -> Dict[str, Any]:
+    """Rewrite selected members of a ZIP archive, copying every other member raw
+
+    ``transforms`` maps member names to callables receiving the member's
+    uncompressed bytes; returning ``None`` keeps the member unchanged.  The
+    result is written to a temporary file and atomically renamed.
+    """
+    temp_path = f"{destination}.tmp-{os.getpid()}"
+    rewritten, copied = [], 0
+    bytes_copied = 0
+    try:
+        with open(source, "rb") as source_file, zipfile.ZipFile(source_file) as archive, \
+                open(temp_path, "wb") as output:
+            writer = StreamingZipWriter(output, compresslevel=compresslevel)
+            for info in archive.infolist():
+                transform = transforms.get(info.filename)
+                new_data = transform(archive.read(info)) if transform else None
+                if new_data is None:
+                    writer.copy_member(source_file, info)
+                    copied += 1
+                    bytes_copied += info.compress_size
+                else:
+                    writer.write_member(info, new_data)
+                    rewritten.append(info.filename)
+            writer.close()
+        os.replace(temp_path, destination)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return {
+        "source": source,
+        "destination": destination,
+        "members_copied_raw": copied,
+        "compressed_bytes_copied_raw": bytes_copied,
+        "members_rewritten": rewritten
+    }
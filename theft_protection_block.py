@@ -20,7 +20,7 @@ import os
 import hashlib
 import datetime
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 class RepositoryTheftProtection:
     """Advanced theft protection and ownership verification system"""
@@ -150,6 +150,21 @@ PROTECTED BY INTERNATIONAL COPYRIGHT LAW
                 return True
         return False
         
+    def detect_code_clones(self, suspect_repository: str, protected_root: Optional[str] = None,
+                           index_path: Optional[str] = None, min_similarity: float = 0.5) -> Dict[str, Any]:
+        """Scan a locally checked-out repository for copies of our source files"""
+        from code_clone_detection import load_or_build_clone_index
+
+        protected_root = protected_root or os.path.dirname(os.path.abspath(__file__))
+        index = load_or_build_clone_index(protected_root, index_path)
+        report = index.scan_repository(suspect_repository, min_similarity)
+        report["owner"] = self.owner
+        report["contact"] = self.contact
+        if report["clone_detected"]:
+            self.log_unauthorized_access(
+                f"{report['files_matched']} files copied into {report['suspect_repository']}")
+        return report
+
     def log_unauthorized_access(self, details: str):
         """Log unauthorized access attempt"""
         logging.critical(f"🚨 UNAUTHORIZED ACCESS DETECTED: {details}")
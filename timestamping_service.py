@@ -0,0 +1,238 @@
+"""
+Merkle-Batched Timestamping Service
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+One Ed25519 signature per batch of ownership signatures instead of one per item
+
+Requests are collected for at most ``max_delay`` seconds or ``max_batch``
+items, whichever comes first.  The batch's item digests become the leaves
+of a Merkle tree, and only a small statement binding the tree root to the
+batch time is signed.  Every item gets a receipt with the signed
+statement and its own O(log n) inclusion proof, which is all a verifier
+needs besides the service's public key.
+"""
+
+import json
+import time
+import queue
+import base64
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Sequence, Union
+
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from copyright_protection import CopyrightProtection
+from merkle_tree import MerkleTree, verify_range_proof
+from ownership_signing import OwnershipSigner, public_key_bytes, verify_signature
+
+TIMESTAMP_STATEMENT_FORMAT = "merkle-timestamp-v1"
+
+Item = Union[Dict[str, Any], bytes]
+
+
+def item_digest(item: Item) -> bytes:
+    """SHA-256 of an ownership signature's signed data, or of raw bytes"""
+    if isinstance(item, dict):
+        return hashlib.sha256(OwnershipSigner.ownership_message(item)).digest()
+    return hashlib.sha256(item).digest()
+
+
+def _statement_bytes(statement: Dict[str, Any]) -> bytes:
+    return json.dumps(statement, sort_keys=True, separators=(",", ":")).encode()
+
+
+class TimestampingService:
+    """Collects timestamp requests and signs one Merkle root per batch
+
+    ``submit`` returns a future that resolves to the item's receipt once
+    its batch has been sealed, so a request waits at most ``max_delay``
+    plus the time to hash and sign one batch.  ``timestamp_batch`` seals a
+    list of items synchronously.
+    """
+
+    def __init__(self, signer: Optional[OwnershipSigner] = None, max_batch: int = 1024,
+                 max_delay: float = 0.05):
+        self.owner = "Ervin Remus Radosavlevici"
+        self.contact = "radosavlevici210@icloud.com"
+        self.signer = signer or OwnershipSigner()
+        self.official_timestamp = CopyrightProtection().official_timestamp
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches_sealed = 0
+        self.items_sealed = 0
+        self._requests: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def timestamp_batch(self, items: Sequence[Item]) -> List[Dict[str, Any]]:
+        """Seal a batch with a single signature and return one receipt per item"""
+        if not items:
+            return []
+        digests = [item_digest(item) for item in items]
+        tree = MerkleTree(digests)
+        statement = {
+            "format": TIMESTAMP_STATEMENT_FORMAT,
+            "merkle_root": tree.root.hex(),
+            "leaf_count": len(tree),
+            "batch_timestamp": datetime.now(timezone.utc).isoformat(),
+            "official_timestamp": self.official_timestamp,
+            "owner": self.owner,
+            "key_id": self.signer.key_id
+        }
+        seal = {
+            "statement": statement,
+            "signature": base64.b64encode(self.signer.sign(_statement_bytes(statement))).decode(),
+            "public_key": base64.b64encode(public_key_bytes(self.signer.public_key)).decode()
+        }
+        self.batches_sealed += 1
+        self.items_sealed += len(items)
+        return [dict(seal, leaf_index=index, item_digest=digest.hex(),
+                     proof=[node.hex() for node in tree.inclusion_proof(index)])
+                for index, digest in enumerate(digests)]
+
+    def submit(self, item: Item) -> Future:
+        """Queue an item; the future resolves to its receipt when its batch is sealed"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Timestamping service is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="timestamping-batcher", daemon=True)
+                self._worker.start()
+            self._requests.put((item, future))
+        return future
+
+    def _run(self):
+        while True:
+            first = self._requests.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            stopping = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+            self._seal(batch)
+            if stopping:
+                return
+
+    def _seal(self, batch: List[Any]):
+        try:
+            receipts = self.timestamp_batch([item for item, _ in batch])
+        except Exception as error:
+            logging.error(f"⏱️ Timestamp batch of {len(batch)} items failed: {error}")
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        for (_, future), receipt in zip(batch, receipts):
+            future.set_result(receipt)
+
+    def close(self):
+        """Seal whatever is queued and stop the batching thread"""
+        with self._lock:
+            self._closed = True
+            worker = self._worker
+        if worker is not None:
+            self._requests.put(None)
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def verify_timestamp_receipt(item: Item, receipt: Dict[str, Any],
+                             public_key: Optional[Union[bytes, str, ed25519.Ed25519PublicKey]] = None
+                             ) -> Dict[str, Any]:
+    """Check an item against its receipt: inclusion proof, signed root and timestamps
+
+    ``public_key`` should be the service's trusted key; without it the key
+    embedded in the receipt is used, which only proves self-consistency.
+    """
+    statement = receipt["statement"]
+    digest = item_digest(item)
+    included = digest.hex() == receipt["item_digest"] and verify_range_proof(
+        [digest], receipt["leaf_index"], statement["leaf_count"],
+        [bytes.fromhex(node) for node in receipt["proof"]], bytes.fromhex(statement["merkle_root"]))
+
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        public_key = public_key_bytes(public_key)
+    signed = verify_signature(_statement_bytes(statement), base64.b64decode(receipt["signature"]),
+                              public_key if public_key is not None else receipt["public_key"])
+
+    # The ownership signature must predate the batch that timestamped it
+    ordered = True
+    if isinstance(item, dict):
+        signature_time = item.get("signature_data", {}).get("signature_timestamp")
+        if signature_time is not None:
+            ordered = (datetime.fromisoformat(signature_time) <= datetime.fromisoformat(statement["batch_timestamp"]))
+    verified = included and signed and ordered
+    return {
+        "status": "VERIFIED" if verified else "FAILED",
+        "included": included,
+        "root_signature_valid": signed,
+        "timestamp_order_valid": ordered,
+        "batch_timestamp": statement["batch_timestamp"],
+        "official_timestamp": statement["official_timestamp"]
+    }
+
+
+def benchmark_timestamping(items: int = 10000, max_batch: int = 1024, max_delay: float = 0.05
+                           ) -> Dict[str, Any]:
+    """Per-item cost and latency of batched timestamping against signing every item"""
+    signer = OwnershipSigner(private_key=ed25519.Ed25519PrivateKey.generate())
+    protection = CopyrightProtection()
+    signatures = [protection.create_ownership_signature(index) for index in range(items)]
+
+    start = time.perf_counter()
+    signer.sign_batch([OwnershipSigner.ownership_message(signature) for signature in signatures])
+    individual_seconds = time.perf_counter() - start
+
+    service = TimestampingService(signer, max_batch, max_delay)
+    start = time.perf_counter()
+    submitted = [(time.perf_counter(), service.submit(signature)) for signature in signatures]
+    latencies = []
+    for submitted_at, future in submitted:
+        future.result()
+        latencies.append(time.perf_counter() - submitted_at)
+    batched_seconds = time.perf_counter() - start
+    service.close()
+    latencies.sort()
+
+    return {
+        "items": items,
+        "batches": service.batches_sealed,
+        "signatures_per_item_individual": 1.0,
+        "signatures_per_item_batched": service.batches_sealed / items,
+        "individual_seconds": individual_seconds,
+        "batched_seconds": batched_seconds,
+        "latency_p50_ms": latencies[len(latencies) // 2] * 1000,
+        "latency_max_ms": latencies[-1] * 1000
+    }
+
+
+if __name__ == "__main__":
+    report = benchmark_timestamping()
+    print("⏱️ MERKLE TIMESTAMPING BENCHMARK")
+    print(f"{report['items']} items in {report['batches']} batches "
+          f"({report['signatures_per_item_batched']:.4f} signatures per item)")
+    print(f"Individual signing: {report['individual_seconds']:.2f}s | batched: {report['batched_seconds']:.2f}s")
+    print(f"Latency p50 {report['latency_p50_ms']:.1f} ms, max {report['latency_max_ms']:.1f} ms")
@@ -0,0 +1,204 @@
+"""
+Parallel Tree Hashing for Very Large Files
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+Multi-core SHA-256 tree digests for ownership signatures and backups
+
+Digest format ``tree-sha256-v1``
+--------------------------------
+The input is split into leaves of ``leaf_size`` bytes (the last leaf may
+be shorter; empty input is a single empty leaf).  Leaves and interior
+nodes are hashed as in RFC 6962 section 2.1::
+
+    leaf(data)      = SHA-256(0x00 || data)
+    node(left, right) = SHA-256(0x01 || left || right)
+    MTH(leaves[0:n]) = node(MTH(leaves[0:k]), MTH(leaves[k:n]))
+
+where ``k`` is the largest power of two smaller than ``n``.  The published
+digest binds the parameters to the tree root::
+
+    SHA-256(b"tree-sha256-v1" || uint64_be(leaf_size) || uint64_be(size) || MTH)
+
+The shape of the tree depends only on the size and ``leaf_size``, never on
+how many threads hashed the leaves.
+"""
+
+import os
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Union
+
+TREE_HASH_FORMAT = "tree-sha256-v1"
+DEFAULT_LEAF_SIZE = 4 * 1024 * 1024
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+Source = Union[str, bytes, bytearray, memoryview]
+
+
+def merkle_tree_root(leaf_digests: Sequence[bytes]) -> bytes:
+    """RFC 6962 Merkle tree head over already-hashed leaves"""
+    if len(leaf_digests) == 1:
+        return leaf_digests[0]
+    split = 1 << ((len(leaf_digests) - 1).bit_length() - 1)
+    left = merkle_tree_root(leaf_digests[:split])
+    right = merkle_tree_root(leaf_digests[split:])
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def _leaf_digest(data) -> bytes:
+    """Hash one leaf; hashlib drops the GIL for buffers this large"""
+    digest = hashlib.sha256(LEAF_PREFIX)
+    digest.update(data)
+    return digest.digest()
+
+
+def _final_digest(root: bytes, leaf_size: int, size: int) -> str:
+    return hashlib.sha256(TREE_HASH_FORMAT.encode() + struct.pack(">QQ", leaf_size, size) + root).hexdigest()
+
+
+class TreeHasher:
+    """Hash fixed-size leaves on a thread pool and combine them into one root
+
+    ``reader="mmap"`` hashes zero-copy slices of a memory map;
+    ``reader="pread"`` reads each leaf with ``os.pread`` into its own
+    buffer, which avoids mapping files larger than the address space.
+    """
+
+    def __init__(self, leaf_size: int = DEFAULT_LEAF_SIZE, threads: Optional[int] = None,
+                 reader: str = "mmap"):
+        if reader not in ("mmap", "pread"):
+            raise ValueError(f"Unknown reader: {reader}")
+        self.leaf_size = leaf_size
+        self.threads = threads or os.cpu_count() or 1
+        self.reader = reader
+
+    def leaf_digests(self, source: Source) -> List[bytes]:
+        """Digest of every leaf, in order"""
+        if not isinstance(source, str):
+            view = memoryview(source).cast("B")
+            offsets = range(0, max(len(view), 1), self.leaf_size)
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                return list(executor.map(lambda offset: _leaf_digest(view[offset:offset + self.leaf_size]),
+                                         offsets))
+
+        descriptor = os.open(source, os.O_RDONLY)
+        try:
+            size = os.fstat(descriptor).st_size
+            if size == 0:
+                return [_leaf_digest(b"")]
+            offsets = range(0, size, self.leaf_size)
+            if self.reader == "pread":
+                with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                    return list(executor.map(
+                        lambda offset: _leaf_digest(os.pread(descriptor, self.leaf_size, offset)), offsets))
+            with mmap.mmap(descriptor, 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                        return list(executor.map(
+                            lambda offset: _leaf_digest(view[offset:offset + self.leaf_size]), offsets))
+                finally:
+                    view.release()
+        finally:
+            os.close(descriptor)
+
+    def hash(self, source: Source) -> Dict[str, Any]:
+        """Tree digest of a file path or bytes-like object"""
+        start = time.perf_counter()
+        size = os.path.getsize(source) if isinstance(source, str) else memoryview(source).nbytes
+        leaves = self.leaf_digests(source)
+        digest = _final_digest(merkle_tree_root(leaves), self.leaf_size, size)
+        return {
+            "format": TREE_HASH_FORMAT,
+            "digest": digest,
+            "leaf_size": self.leaf_size,
+            "size": size,
+            "leaves": len(leaves),
+            "threads": self.threads,
+            "elapsed_seconds": time.perf_counter() - start
+        }
+
+
+def tree_hash(source: Source, leaf_size: int = DEFAULT_LEAF_SIZE, threads: Optional[int] = None,
+              reader: str = "mmap") -> str:
+    """Hex ``tree-sha256-v1`` digest of a file path or bytes-like object"""
+    return TreeHasher(leaf_size, threads, reader).hash(source)["digest"]
+
+
+def verify_tree_hash(source: Source, expected_digest: str, leaf_size: int = DEFAULT_LEAF_SIZE,
+                     threads: Optional[int] = None) -> bool:
+    """Check a file against a tree digest; the thread count does not affect the result"""
+    matches = tree_hash(source, leaf_size, threads) == expected_digest
+    if not matches:
+        logging.warning("🌳 Tree hash mismatch")
+    return matches
+
+
+def _sha256_file(path: str, buffer_size: int = 1024 * 1024) -> str:
+    """Plain single-stream SHA-256 of a file, for comparison"""
+    digest = hashlib.sha256()
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as handle:
+        while True:
+            read = handle.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+def benchmark_tree_hashing(size_bytes: int = 4 * 1024 ** 3, thread_counts: Sequence[int] = (1, 2, 4, 8),
+                           leaf_size: int = DEFAULT_LEAF_SIZE, directory: Optional[str] = None) -> Dict[str, Any]:
+    """Compare tree hashing at several thread counts with plain SHA-256 on one large file"""
+    with tempfile.TemporaryDirectory(dir=directory) as workdir:
+        path = os.path.join(workdir, "large.bin")
+        block = os.urandom(16 * 1024 * 1024)
+        with open(path, "wb") as handle:
+            for offset in range(0, size_bytes, len(block)):
+                handle.write(block[:min(len(block), size_bytes - offset)])
+
+        gigabytes = size_bytes / 1024 ** 3
+        start = time.perf_counter()
+        _sha256_file(path)
+        sha_seconds = time.perf_counter() - start
+
+        runs, digests = [], set()
+        for threads in thread_counts:
+            for reader in ("mmap", "pread"):
+                result = TreeHasher(leaf_size, threads, reader).hash(path)
+                digests.add(result["digest"])
+                runs.append({
+                    "threads": threads,
+                    "reader": reader,
+                    "gigabytes_per_second": gigabytes / result["elapsed_seconds"],
+                    "speedup_vs_sha256": sha_seconds / result["elapsed_seconds"]
+                })
+
+    return {
+        "size_bytes": size_bytes,
+        "sha256_gigabytes_per_second": gigabytes / sha_seconds,
+        "tree_hash_runs": runs,
+        "digest_stable_across_threads": len(digests) == 1
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    size = int(float(sys.argv[1]) * 1024 ** 3) if len(sys.argv) > 1 else 2 * 1024 ** 3
+    report = benchmark_tree_hashing(size)
+    print("🌳 TREE HASH BENCHMARK")
+    print(f"File: {report['size_bytes'] / 1024 ** 3:.1f} GiB | "
+          f"SHA-256: {report['sha256_gigabytes_per_second']:.2f} GiB/s")
+    for run in report["tree_hash_runs"]:
+        print(f"{run['threads']:>2} threads ({run['reader']}): {run['gigabytes_per_second']:.2f} GiB/s "
+              f"({run['speedup_vs_sha256']:.2f}x)")
+    print(f"Digest stable across thread counts: {report['digest_stable_across_threads']}")
@@ -0,0 +1,308 @@
+"""
+Fixed-Width Watermark Headers
+Copyright © 2025 Ervin Remus Radosavlevici
+Contact: radosavlevici210@icloud.com
+ORCID: 0009-0000-9787-510X
+In-place re-keying of watermarked files without rewriting their bodies
+
+Layout (format version 02)
+--------------------------
+The header keeps the comment style of the original watermark but every
+value is space-padded to a fixed byte width, so every field sits at a
+fixed offset and the header has a fixed total length::
+
+    \\n
+    # WATERMARK FORMAT: 02
+    # DIGITAL WATERMARK: <64 bytes>
+    # COPYRIGHT: <96 bytes>
+    ...
+    # ALL RIGHTS RESERVED
+    \\n
+
+Re-keying overwrites the value bytes through ``mmap``; the body that
+follows the header is never touched.  Files still carrying the original
+variable-length header are rewritten once into this layout.
+"""
+
+import os
+import mmap
+import time
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from file_transfer import copy_range
+
+HEADER_VERSION = 2
+HEADER_FIELDS: Tuple[Tuple[str, str, int], ...] = (
+    ("watermark", "DIGITAL WATERMARK", 64),
+    ("copyright", "COPYRIGHT", 96),
+    ("contact", "CONTACT", 96),
+    ("orcid", "ORCID", 32),
+    ("signature", "SIGNATURE", 96),
+    ("timestamp", "TIMESTAMP", 40),
+    ("deployment_key", "DEPLOYMENT KEY", 64),
+)
+HEADER_TRAILER = b"# VERIFICATION: AUTHENTIC PRODUCTION CODE\n# ALL RIGHTS RESERVED\n\n"
+VERSION_PREFIX = b"\n# WATERMARK FORMAT: "
+LEGACY_PREFIX = b"\n# DIGITAL WATERMARK: "
+LEGACY_TERMINATOR = b"# ALL RIGHTS RESERVED\n\n"
+LEGACY_LABELS = {label: name for name, label, _ in HEADER_FIELDS}
+
+
+def _field_offsets() -> Tuple[Dict[str, Tuple[int, int]], int]:
+    """Byte offset and width of every field value, plus the total header length"""
+    offsets = {}
+    position = len(VERSION_PREFIX) + 3
+    for name, label, width in HEADER_FIELDS:
+        position += len(f"# {label}: ".encode())
+        offsets[name] = (position, width)
+        position += width + 1
+    return offsets, position + len(HEADER_TRAILER)
+
+
+FIELD_OFFSETS, HEADER_LENGTH = _field_offsets()
+
+
+def _pad(name: str, value: str, width: int) -> bytes:
+    encoded = value.encode("utf-8")
+    if len(encoded) > width:
+        raise ValueError(f"Watermark field {name} exceeds its fixed width of {width} bytes")
+    return encoded.ljust(width, b" ")
+
+
+def build_fixed_header(fields: Dict[str, str]) -> bytes:
+    """Fixed-width header bytes for the given field values"""
+    parts = [VERSION_PREFIX, b"%02X\n" % HEADER_VERSION]
+    for name, label, width in HEADER_FIELDS:
+        parts.append(f"# {label}: ".encode() + _pad(name, fields[name], width) + b"\n")
+    parts.append(HEADER_TRAILER)
+    header = b"".join(parts)
+    assert len(header) == HEADER_LENGTH
+    return header
+
+
+def parse_fixed_header(header: bytes) -> Dict[str, str]:
+    """Field values of a fixed-width header; raises ``ValueError`` if it is not one"""
+    if len(header) < HEADER_LENGTH or not header.startswith(VERSION_PREFIX):
+        raise ValueError("Not a fixed-width watermark header")
+    version = int(header[len(VERSION_PREFIX):len(VERSION_PREFIX) + 2], 16)
+    if version != HEADER_VERSION:
+        raise ValueError(f"Unsupported watermark header version {version}")
+    return {name: header[offset:offset + width].decode("utf-8").rstrip(" ")
+            for name, (offset, width) in FIELD_OFFSETS.items()}
+
+
+def parse_legacy_header(data: bytes) -> Optional[Tuple[Dict[str, str], int]]:
+    """Fields and body offset of an original variable-length header, if present"""
+    if not data.startswith(LEGACY_PREFIX):
+        return None
+    end = data.find(LEGACY_TERMINATOR)
+    if end < 0:
+        return None
+    fields = {}
+    for line in data[1:end].decode("utf-8").splitlines():
+        label, _, value = line[2:].partition(": ")
+        if label in LEGACY_LABELS:
+            fields[LEGACY_LABELS[label]] = value
+    return fields, end + len(LEGACY_TERMINATOR)
+
+
+def detect_header_layout(path: str) -> str:
+    """``"fixed"``, ``"legacy"`` or ``"none"`` for a file"""
+    with open(path, "rb") as handle:
+        start = handle.read(max(len(VERSION_PREFIX), len(LEGACY_PREFIX)))
+    if start.startswith(VERSION_PREFIX):
+        return "fixed"
+    if start.startswith(LEGACY_PREFIX):
+        return "legacy"
+    return "none"
+
+
+def patch_header_in_place(descriptor: int, fields: Dict[str, str]) -> Dict[str, str]:
+    """Overwrite the field values of a fixed-width header through ``mmap``
+
+    Only the first page(s) holding the header are mapped.  Returns the
+    values that were replaced.  The caller is responsible for ``fsync``.
+    """
+    if os.fstat(descriptor).st_size < HEADER_LENGTH:
+        raise ValueError("File is shorter than a fixed-width watermark header")
+    with mmap.mmap(descriptor, HEADER_LENGTH, access=mmap.ACCESS_WRITE) as mapped:
+        previous = parse_fixed_header(mapped[:HEADER_LENGTH])
+        for name, (offset, width) in FIELD_OFFSETS.items():
+            if name in fields:
+                mapped[offset:offset + width] = _pad(name, fields[name], width)
+    return previous
+
+
+def rewrite_legacy_file(path: str, fields: Dict[str, str]) -> Dict[str, str]:
+    """Rewrite a legacy-header file with a fixed-width header via a temp file and atomic rename"""
+    with open(path, "rb") as source:
+        head = source.read(4096)
+        parsed = parse_legacy_header(head)
+        while parsed is None and len(head) < 1024 * 1024:
+            more = source.read(4096)
+            if not more:
+                break
+            head += more
+            parsed = parse_legacy_header(head)
+        if parsed is None:
+            raise ValueError(f"Unrecognised watermark header in {path}")
+        previous, body_offset = parsed
+
+        merged = dict(previous)
+        merged.update(fields)
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".rekey-")
+        try:
+            with os.fdopen(descriptor, "wb") as output:
+                output.write(build_fixed_header(merged))
+                source.seek(body_offset)
+                while True:
+                    block = source.read(1024 * 1024)
+                    if not block:
+                        break
+                    output.write(block)
+                output.flush()
+                os.fsync(output.fileno())
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return previous
+
+
+def prepend_header_to_file(source_path: str, header: bytes,
+                           destination_path: Optional[str] = None) -> Dict[str, Any]:
+    """Write ``header`` followed by the source's bytes, via a temp file and atomic rename
+
+    The body is moved kernel-side by :func:`file_transfer.copy_range`
+    (``copy_file_range``, then ``sendfile``, then a buffered copy), so it
+    never passes through Python.  ``destination_path`` defaults to the
+    source, which is then replaced.
+    """
+    destination_path = destination_path or source_path
+    directory = os.path.dirname(os.path.abspath(destination_path))
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".watermark-")
+    try:
+        source_descriptor = os.open(source_path, os.O_RDONLY)
+        try:
+            status = os.fstat(source_descriptor)
+            view = memoryview(header)
+            while view:
+                view = view[os.write(descriptor, view):]
+            copied = copy_range(source_descriptor, descriptor, status.st_size)
+        finally:
+            os.close(source_descriptor)
+        os.fsync(descriptor)
+        os.close(descriptor)
+        descriptor = None
+        os.chmod(temp_path, status.st_mode & 0o7777)
+        os.replace(temp_path, destination_path)
+    finally:
+        if descriptor is not None:
+            os.close(descriptor)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return {
+        "path": destination_path,
+        "header_bytes": len(header),
+        "body_bytes": copied["bytes_copied"],
+        "copy_methods": copied["methods"]
+    }
+
+
+def _rekey_group(paths: Sequence[str], fields: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Patch or rewrite one group of files, then fsync the patched files and renamed directories together"""
+    results, pending = [], []
+    renamed_directories = set()
+    try:
+        for path in paths:
+            try:
+                layout = detect_header_layout(path)
+                if layout == "fixed":
+                    descriptor = os.open(path, os.O_RDWR)
+                    pending.append(descriptor)
+                    previous = patch_header_in_place(descriptor, fields)
+                    results.append({"path": path, "status": "PATCHED_IN_PLACE",
+                                    "previous_signature": previous.get("signature")})
+                elif layout == "legacy":
+                    previous = rewrite_legacy_file(path, fields)
+                    renamed_directories.add(os.path.dirname(os.path.abspath(path)))
+                    results.append({"path": path, "status": "REWRITTEN_FROM_LEGACY",
+                                    "previous_signature": previous.get("signature")})
+                else:
+                    results.append({"path": path, "status": "NOT_WATERMARKED"})
+            except (OSError, ValueError) as error:
+                logging.error(f"Re-keying failed for {path}: {error}")
+                results.append({"path": path, "status": "FAILED", "error": str(error)})
+        # One durability barrier for the whole group instead of one per patch
+        for descriptor in pending:
+            os.fsync(descriptor)
+        for directory in renamed_directories:
+            directory_descriptor = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(directory_descriptor)
+            finally:
+                os.close(directory_descriptor)
+    finally:
+        for descriptor in pending:
+            os.close(descriptor)
+    return results
+
+
+def rekey_watermarked_files(paths: Sequence[str], fields: Dict[str, str], workers: Optional[int] = None,
+                            group_size: int = 64) -> Dict[str, Any]:
+    """Replace the watermark fields of many files in parallel
+
+    Files are split into groups of ``group_size``; each thread patches a
+    group through ``mmap`` and then fsyncs the whole group.  Legacy files
+    are rewritten into the fixed layout, which makes the next re-key an
+    in-place patch.
+    """
+    start = time.perf_counter()
+    groups = [list(paths[offset:offset + group_size]) for offset in range(0, len(paths), group_size)]
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as executor:
+        results = [result for group in executor.map(lambda group: _rekey_group(group, fields), groups)
+                   for result in group]
+    elapsed = time.perf_counter() - start
+
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    logging.info(f"🔑 Re-keyed {len(results)} files in {elapsed:.2f}s: {counts}")
+    return {
+        "files_processed": len(results),
+        "status_counts": counts,
+        "elapsed_seconds": elapsed,
+        "files_per_second": len(results) / elapsed if elapsed else 0.0,
+        "results": results
+    }
+
+
+def list_watermarked_files(root: str) -> List[str]:
+    """Every regular file under ``root`` that carries a watermark header"""
+    found = []
+    for directory, subdirectories, names in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if name != ".git")
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and detect_header_layout(path) != "none":
+                found.append(path)
+    return found
+
+
+if __name__ == "__main__":
+    import sys
+    from signed_production_deployment import SignedProductionDeployment
+
+    if len(sys.argv) < 3 or sys.argv[1] != "rekey":
+        print("Usage: python watermark_header.py rekey <directory>")
+        sys.exit(1)
+    report = SignedProductionDeployment().rekey_watermarked_files(list_watermarked_files(sys.argv[2]))
+    print("🔑 WATERMARK RE-KEY COMPLETE")
+    print(f"Files: {report['files_processed']} in {report['elapsed_seconds']:.2f}s")
+    for status, count in sorted(report["status_counts"].items()):
+        print(f"{status}: {count}")